@@ -1,7 +1,30 @@
 """Core modules for GPT Document Classifier MVP."""
 
-from .gpt_core import GPTCore  # noqa: F401
-from .knowledge_base import KnowledgeBase  # noqa: F401
-from .processor import DocumentProcessor  # noqa: F401
-from .validator import Validator  # noqa: F401
-from .watcher import FeedbackWatcher, IntakeWatcher  # noqa: F401
+import importlib
+from typing import Any
+
+# Reexports resolvidos sob demanda (PEP 562): importar um submodulo leve, como
+# core.ratelimit, nao carrega openai/numpy/PyMuPDF junto.
+_EXPORTS = {
+    "GPTCore": "gpt_core",
+    "KnowledgeBase": "knowledge_base",
+    "DocumentProcessor": "processor",
+    "Validator": "validator",
+    "FeedbackWatcher": "watcher",
+    "IntakeWatcher": "watcher",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def content_digest(data: bytes) -> str:
+    """Content address used as cache key (BLAKE2b-128 over the raw file bytes)."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ClassificationCache:
+    """SQLite sidecar mapping document digests to their validated classification."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Uma conexao compartilhada entre as threads de processamento, serializada pelo lock.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(classifications)")}
+        if columns and "context" not in columns:
+            # Esquema antigo (chave so pelo digest): o cache e descartavel, entao e recriado.
+            self._conn.execute("DROP TABLE classifications")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            " digest TEXT NOT NULL,"
+            " context TEXT NOT NULL,"
+            " category TEXT,"
+            " confidence REAL,"
+            " model TEXT,"
+            " created_at REAL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (digest, context))"
+        )
+
+    def get(self, digest: str, context: str) -> Optional[Dict]:
+        """Cached result for ``digest`` classified under ``context`` (model, prompt version, KB feedback)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM classifications WHERE digest = ? AND context = ?", (digest, context)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logging.warning("Entrada corrompida no cache de classificacao (%s); ignorando.", digest)
+            return None
+
+    def put(self, digest: str, context: str, result: Dict, model: Optional[str] = None) -> None:
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications"
+                " (digest, context, category, confidence, model, created_at, result)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    digest,
+                    context,
+                    result.get("categoria"),
+                    result.get("confidence"),
+                    model,
+                    time.time(),
+                    payload,
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,43 @@
+"""Small byte-level file writers shared by the pipeline and the feedback tools."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from core.optional_deps import orjson
+
+# O_BINARY (Windows) evita a traducao de "\n"; nas demais plataformas vale 0.
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """Write every byte of ``data`` to ``fd``, looping over short writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def atomic_write_bytes(target: Path, data: bytes) -> None:
+    """Write ``data`` to a hidden sibling and publish it over ``target`` with os.replace."""
+    # O temporario oculto (".nome.tmp") e ignorado pelos watchers; quem observa a pasta
+    # so enxerga o arquivo completo, ja renomeado.
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    fd = os.open(tmp_path, _WRITE_FLAGS, 0o644)
+    try:
+        try:
+            write_all(fd, data)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, target)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def dumps_pretty(payload: Dict[str, Any]) -> bytes:
+    """Indented UTF-8 JSON ending in a newline (orjson when installed, stdlib json otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(payload, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
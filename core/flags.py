@@ -0,0 +1,12 @@
+"""Boolean parsing shared by the configuration loader and the GPT client setup."""
+
+from typing import Any
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+
+def parse_bool(value: Any) -> bool:
+    """Interpret config/env flags: "1", "true", "yes", "on" (any case) are true; non-strings use bool()."""
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_VALUES
+    return bool(value)
@@ -3,9 +3,16 @@ import os
 import unicodedata
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from core.flags import parse_bool
 from core.knowledge_base import KnowledgeBase
+from core.ratelimit import TokenBucket
 
 
 def _normalize_category_name(value: str) -> str:
@@ -28,12 +35,181 @@ except ImportError:  # pragma: no cover - library not installed yet
     AzureOpenAI = None  # type: ignore
 
 
+_PRIMARY_SYSTEM_PROMPT = (
+    "Você é um classificador especialista em documentação corporativa. "
+    "Classifique documentos por categoria e tema considerando o contexto completo."
+    " Responda sempre em JSON válido."
+)
+
+# Incrementar ao alterar os templates de prompt ou o formato da resposta: invalida o cache persistente.
+_PROMPT_VERSION = 1
+
+# Mesmas instrucoes do prompt primario, acrescidas apenas do enquadramento de lote.
+_BATCH_SYSTEM_PROMPT = _PRIMARY_SYSTEM_PROMPT + (
+    " Você receberá um JSON com 'shared_request' (instruções, perfis de categoria e 'output_schema' "
+    "comuns a todos os documentos) e 'documents', cada um com 'row_id', 'document_name', "
+    "'similar_context' e 'document_excerpt'. Classifique cada documento de forma independente "
+    "seguindo o 'output_schema'. Responda no formato {\"resultados\": [{\"row_id\": <id>, ...campos do output_schema}]}, "
+    "com exatamente um item por documento."
+)
+
+
+def _primary_row(request: Dict) -> Dict:
+    """Per-document fields of a primary request (sent once per row in a batch)."""
+    return {
+        "document_name": request.get("document_name"),
+        "similar_context": request.get("instructions", {}).get("context"),
+        "document_excerpt": request.get("document_excerpt"),
+    }
+
+
+def _shared_primary_context(request: Dict) -> Dict:
+    """Primary request minus the per-document fields (sent once per batch)."""
+    shared = {key: value for key, value in request.items() if key not in ("document_name", "document_excerpt")}
+    shared["instructions"] = {
+        key: value for key, value in request.get("instructions", {}).items() if key != "context"
+    }
+    return shared
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _PromptBatcher:
+    """Groups primary requests submitted within a short window into one multi-row LLM call.
+
+    A collector thread only forms batches; each batch runs on an executor sized like the LLM
+    concurrency cap, so several batches can be in flight. Rows the batch did not answer, a
+    failed batch, or a batch that did not answer within ``wait_timeout_s`` come back as
+    ``None`` and are re-run alone on the submitting thread.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Dict]], List[Optional[Dict]]],
+        run_single: Callable[[Dict], Dict],
+        batch_size: int,
+        window_s: float,
+        max_in_flight: int,
+        wait_timeout_s: float,
+    ):
+        self._run_batch = run_batch
+        self._run_single = run_single
+        self.batch_size = batch_size
+        self.window_s = window_s
+        self.max_in_flight = max(1, max_in_flight)
+        self.wait_timeout_s = wait_timeout_s
+        self._queue: "queue.Queue[Optional[Tuple[Dict, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, request: Dict) -> Dict:
+        future: Future = Future()
+        result = None
+        if self._ensure_thread():
+            self._queue.put((request, future))
+            try:
+                result = future.result(timeout=self.wait_timeout_s)
+            except FutureTimeoutError:
+                # Coletor parado ou lote travado: o documento nao fica esperando para sempre.
+                logging.warning("Lote primario sem resposta em %.0fs; enviando o documento individualmente.", self.wait_timeout_s)
+        if result is None:
+            # Reenvio individual na thread do proprio documento: nao bloqueia os lotes seguintes.
+            return self._run_single(request)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _ensure_thread(self) -> bool:
+        """Start (or restart) the collector; False once the batcher was closed."""
+        with self._lock:
+            if self._closed:
+                return False
+            if self._thread is None or not self._thread.is_alive():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="GPTBatch")
+                self._thread = threading.Thread(
+                    target=self._loop, args=(self._executor,), name="GPTPromptBatcher", daemon=True
+                )
+                self._thread.start()
+            return True
+
+    def _loop(self, executor: ThreadPoolExecutor) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._schedule(executor, batch)
+                    return
+                batch.append(item)
+            self._schedule(executor, batch)
+
+    def _schedule(self, executor: ThreadPoolExecutor, batch: List[Tuple[Dict, Future]]) -> None:
+        try:
+            executor.submit(self._dispatch, batch)
+        except RuntimeError:
+            # Executor ja encerrado (close concorrente): cada documento segue sozinho.
+            for _, future in batch:
+                future.set_result(None)
+
+    def _dispatch(self, batch: List[Tuple[Dict, Future]]) -> None:
+        try:
+            results = self._run_batch([request for request, _ in batch])
+        except Exception as exc:
+            logging.warning(
+                "Falha no lote de %s documentos (%s); reenviando cada um individualmente.", len(batch), exc
+            )
+            results = [None] * len(batch)
+        except BaseException:
+            for _, future in batch:
+                future.set_result(None)
+            raise
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
 class GPTCore:
     """Encapsulates all GPT interactions for document understanding."""
 
-    def __init__(self, config: Dict, knowledge_base: KnowledgeBase):
+    def __init__(
+        self,
+        config: Dict,
+        knowledge_base: KnowledgeBase,
+        rate_limiter: Optional[TokenBucket] = None,
+        http_client: Any = None,
+    ):
         self.config = config
         self.knowledge_base = knowledge_base
+        self.rate_limiter = rate_limiter
+        # httpx.Client compartilhado (pool de conexoes keep-alive); None usa o cliente padrao do SDK.
+        self.http_client = http_client
         self._client = None
         self.offline_mode = False
         self.azure_endpoint = (
@@ -60,9 +236,10 @@ class GPTCore:
             or os.getenv("OPENAI_API_VERSION")
             or "2024-02-01"
         )
+        # Strings como "false"/"0" vindas do ambiente ou do JSON nao podem habilitar o Azure.
         self.azure_enabled = bool(
-            config.get("use_azure")
-            or os.getenv("USE_AZURE_OPENAI")
+            parse_bool(config.get("use_azure"))
+            or parse_bool(os.getenv("USE_AZURE_OPENAI"))
             or self.azure_endpoint
         )
 
@@ -80,18 +257,46 @@ class GPTCore:
                 self.offline_mode = True
                 logging.warning("GPTCore em modo offline. Forneca OPENAI_API_KEY (ou configure Azure) e instale o pacote 'openai'.")
 
+        # Teto de chamadas simultaneas ao modelo, compartilhado por todas as threads de processamento.
+        llm_max_concurrency = max(1, int(config.get("llm_max_concurrency", 8) or 1))
+        self._llm_slots = threading.BoundedSemaphore(llm_max_concurrency)
+
+        # Micro-lotes do prompt primario: documentos que chegam juntos dividem uma unica chamada.
+        batch_size = max(1, int(config.get("llm_batch_size", 1) or 1))
+        batch_window_s = max(0.0, float(config.get("llm_batch_window_ms", 100) or 0)) / 1000.0
+        self._primary_batcher: Optional[_PromptBatcher] = None
+        if batch_size > 1:
+            self._primary_batcher = _PromptBatcher(
+                self._run_primary_batch,
+                self._run_single_request,
+                batch_size,
+                batch_window_s,
+                max_in_flight=llm_max_concurrency,
+                # Janela + duas vezes o timeout HTTP: cobre a chamada do lote e uma retentativa.
+                wait_timeout_s=batch_window_s + 2 * float(config.get("request_timeout") or 60),
+            )
+
+    def close(self) -> None:
+        """Stop the prompt batcher threads (the shared HTTP client belongs to the caller)."""
+        if self._primary_batcher is not None:
+            self._primary_batcher.close()
+
     def _client_instance(self):
         if self.offline_mode:
             return None
         if self._client is None:
+            extra: Dict[str, Any] = {}
+            if self.http_client is not None:
+                extra["http_client"] = self.http_client
             if self.azure_enabled:
                 self._client = AzureOpenAI(
                     azure_endpoint=self.azure_endpoint,
                     api_key=self.azure_api_key,
                     api_version=self.azure_api_version,
+                    **extra,
                 )
             else:
-                self._client = OpenAI(api_key=self.config["api_key"])
+                self._client = OpenAI(api_key=self.config["api_key"], **extra)
         return self._client
 
     def ensure_available(self) -> None:
@@ -300,7 +505,7 @@ class GPTCore:
         category_document_profiles: Dict[str, Dict[str, Any]],
         category_feedback_profiles: Dict[str, Dict[str, Any]],
     ) -> Dict:
-        prompt = self._render_primary_prompt(
+        request = self._build_primary_request(
             text,
             metadata,
             context_summary,
@@ -309,20 +514,65 @@ class GPTCore:
             category_document_profiles,
             category_feedback_profiles,
         )
+        if self._primary_batcher is not None:
+            return self._primary_batcher.submit(request)
+        return self._run_single_request(request)
+
+    def _run_single_request(self, request: Dict) -> Dict:
+        return self._run_single_primary(json.dumps(request, ensure_ascii=False))
+
+    def _run_single_primary(self, prompt: str) -> Dict:
         messages = [
-            {
-                "role": "system",
-                "content": (
-                    "Você é um classificador especialista em documentação corporativa. "
-                    "Classifique documentos por categoria e tema considerando o contexto completo."
-                    " Responda sempre em JSON válido."
-                ),
-            },
+            {"role": "system", "content": _PRIMARY_SYSTEM_PROMPT},
             {"role": "user", "content": prompt},
         ]
         response = self._chat_completion(messages, self.config.get("model"))
         return self._parse_response(response)
 
+    def _run_primary_batch(self, requests: List[Dict]) -> List[Optional[Dict]]:
+        """Classify several primary requests in one call; ``None`` marks rows to re-run alone.
+
+        The shared part of the request (instructions, category profiles, schema) is sent once;
+        each row only carries its name, similarity context and excerpt. Rows whose shared part
+        differs from the first one (the knowledge base changed in between) are re-run alone.
+        """
+        if len(requests) == 1:
+            return [None]
+        shared = _shared_primary_context(requests[0])
+        rows: List[Dict] = []
+        row_index: Dict[int, int] = {}
+        for index, request in enumerate(requests):
+            if index and _shared_primary_context(request) != shared:
+                continue
+            row_index[len(rows) + 1] = index
+            rows.append({"row_id": len(rows) + 1, **_primary_row(request)})
+        results: List[Optional[Dict]] = [None] * len(requests)
+        if len(rows) == 1:
+            return results
+        messages = [
+            {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps({"shared_request": shared, "documents": rows}, ensure_ascii=False)},
+        ]
+        response = self._chat_completion(messages, self.config.get("model"))
+        parsed = self._parse_response(response, {})
+        items = parsed.get("resultados") if isinstance(parsed, dict) else parsed
+        answered = 0
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                row_id = int(item.pop("row_id"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if row_id in row_index:
+                results[row_index[row_id]] = item
+                answered += 1
+        logging.info("Lote de %s documentos classificado em uma chamada (%s respostas).", len(rows), answered)
+        for row_id, index in row_index.items():
+            if results[index] is None:
+                logging.warning("Resposta do lote sem row_id %s; reenviando documento individualmente.", row_id)
+        return results
+
     def _run_cross_validation(
         self,
         primary: Dict,
@@ -398,7 +648,7 @@ class GPTCore:
     # -------------------------------------------------------------------------
     # Prompt Templates
     # -------------------------------------------------------------------------
-    def _render_primary_prompt(
+    def _build_primary_request(
         self,
         text: str,
         metadata: Dict,
@@ -407,7 +657,7 @@ class GPTCore:
         category_profiles: Dict[str, Dict[str, List[str]]],
         category_document_profiles: Dict[str, Dict[str, Any]],
         category_feedback_profiles: Dict[str, Dict[str, Any]],
-    ) -> str:
+    ) -> Dict[str, Any]:
         category_brief = {
             cat: profile for cat, profile in category_profiles.items() if profile.get("top_keywords")
         }
@@ -479,7 +729,7 @@ class GPTCore:
             },
             "document_excerpt": text[:4000],
         }
-        return json.dumps(template, ensure_ascii=False)
+        return template
 
     def _render_cross_prompt(
         self,
@@ -1099,16 +1349,26 @@ class GPTCore:
         if temperature is not None:
             payload["temperature"] = float(temperature)
         timeout = self.config.get("request_timeout")
+        if self.rate_limiter is not None:
+            # Estimativa grosseira (~4 caracteres por token) para o orcamento de tokens por minuto.
+            self.rate_limiter.acquire(sum(len(message.get("content") or "") for message in messages) // 4)
         try:
-            if timeout:
-                response = client.chat.completions.create(timeout=timeout, **payload)
-            else:
-                response = client.chat.completions.create(**payload)
+            with self._llm_slots:
+                if timeout:
+                    response = client.chat.completions.create(timeout=timeout, **payload)
+                else:
+                    response = client.chat.completions.create(**payload)
             return response
         except Exception as exc:
+            if self.rate_limiter is not None and getattr(exc, "status_code", None) == 429:
+                self.rate_limiter.penalize(_retry_after_seconds(exc))
             logging.error("OpenAI chat completion failed: %s", exc)
             raise GPTServiceUnavailable("Falha ao contatar o modelo GPT.", exc)
 
+    def cache_signature(self) -> str:
+        """Model and prompt version a persisted classification is only valid for."""
+        return f"{self._chat_model_name()}|prompt=v{_PROMPT_VERSION}"
+
     def _chat_model_name(self) -> str:
         if self.azure_enabled:
             return self.azure_deployment or ""
@@ -15,15 +15,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
-try:
-    import fitz  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    fitz = None  # type: ignore
-
-try:
-    from docx import Document  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    Document = None  # type: ignore
+from core.optional_deps import import_docx_document, import_fitz
 
 
 SUPPORTED_KNOWLEDGE_EXTENSIONS = {".pdf", ".docx", ".txt"}
@@ -104,7 +96,7 @@ def _slugify_category_name(value: str) -> str:
     return "_".join(part for part in cleaned.split("_") if part)
 
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeEntry:
     """Dataclass representing an entry in the knowledge base."""
 
@@ -146,6 +138,8 @@ class KnowledgeBase:
         self.category_root = Path(category_root).resolve() if category_root else None
         self._lock = threading.RLock()
         self._category_scan_lock = threading.RLock()
+        # Incrementado a cada carga/gravacao; permite caches externos baratos.
+        self._revision = 0
         self._data = {
             "version": 1,
             "entries": [],
@@ -175,6 +169,7 @@ class KnowledgeBase:
                     if key not in loaded:
                         loaded[key] = value if not isinstance(value, dict) else dict(value)
                 self._data = loaded
+                self._revision += 1
                 logging.debug("Knowledge base loaded with %s entries.", len(self._data.get("entries", [])))
             else:
                 logging.info("Knowledge base not found. Creating a new one at %s", self.path)
@@ -185,6 +180,19 @@ class KnowledgeBase:
             self.path.parent.mkdir(parents=True, exist_ok=True)
             with open(self.path, "w", encoding="utf-8") as handler:
                 json.dump(self._data, handler, indent=2, ensure_ascii=False)
+            self._revision += 1
+
+    @property
+    def revision(self) -> int:
+        """Monotonic counter bumped whenever the in-memory data is reloaded or persisted."""
+        with self._lock:
+            return self._revision
+
+    @property
+    def feedback_count(self) -> int:
+        """Number of human feedback records applied so far (persisted, unlike ``revision``)."""
+        with self._lock:
+            return len(self._data.get("feedback_history", []))
 
     def _slugify(self, value: str) -> str:
         normalized = unicodedata.normalize("NFKD", value or "")
@@ -277,8 +285,7 @@ class KnowledgeBase:
                     target,
                     exc,
                 )
-        with open(meta_path, "w", encoding="utf-8") as handler:
-            json.dump(combined_meta, handler, indent=2, ensure_ascii=False)
+        meta_path.write_text(json.dumps(combined_meta, indent=2, ensure_ascii=False), encoding="utf-8")
         try:
             shutil.rmtree(duplicate)
             logging.info(
@@ -501,8 +508,7 @@ class KnowledgeBase:
                 metadata["updated_at"] = _timestamp()
             if "created_at" not in metadata:
                 metadata["created_at"] = _timestamp()
-            with open(meta_path, "w", encoding="utf-8") as handler:
-                json.dump(metadata, handler, indent=2, ensure_ascii=False)
+            meta_path.write_text(json.dumps(metadata, indent=2, ensure_ascii=False), encoding="utf-8")
 
             normalized_target = _normalize_label(metadata.get("name", category))
             for child in self.category_root.iterdir():
@@ -541,6 +547,7 @@ class KnowledgeBase:
                 logging.error("Falha ao ler TXT %s: %s", path, exc)
                 return ""
         if suffix == ".pdf":
+            fitz = import_fitz()
             if fitz is None:
                 logging.error(
                     "PyMuPDF (fitz) não está instalado. Ignorando arquivo PDF de conhecimento: %s",
@@ -554,6 +561,7 @@ class KnowledgeBase:
                 logging.error("Erro ao extrair texto de PDF %s: %s", path, exc)
                 return ""
         if suffix == ".docx":
+            Document = import_docx_document()
             if Document is None:
                 logging.error(
                     "python-docx não está instalado. Ignorando arquivo DOCX de conhecimento: %s",
@@ -788,8 +796,7 @@ class KnowledgeBase:
         if not path.exists():
             header = f"# Fonte: {source_file}\n# Registrado em: {_timestamp()}\n\n"
             try:
-                with open(path, "w", encoding="utf-8") as handler:
-                    handler.write(header + normalized_snippet + "\n")
+                path.write_text(header + normalized_snippet + "\n", encoding="utf-8")
             except OSError as exc:
                 logging.error(
                     "Falha ao gravar evidencias de feedback em %s: %s",
@@ -1098,6 +1105,14 @@ class KnowledgeBase:
         scored.sort(key=lambda item: item[1], reverse=True)
         return scored[:top_n]
 
+    def needs_reprocess(self, file_name: str) -> bool:
+        """True when feedback asked for a reanalysis of the entry registered under ``file_name``."""
+        with self._lock:
+            for entry in self._data.get("entries", []):
+                if entry.get("file_name") == file_name:
+                    return bool(entry.get("needs_reprocess"))
+        return False
+
     def known_categories(self) -> List[str]:
         with self._lock:
             return list(self._data.get("categories", []))
@@ -1,15 +1,22 @@
 import json
 import logging
 import urllib.request
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 
 class TeamsNotifier:
     """Send Adaptive Card summaries to Microsoft Teams via incoming webhook."""
 
-    def __init__(self, analysis_webhook_url: str, activity_webhook_url: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        analysis_webhook_url: str,
+        activity_webhook_url: Optional[str] = None,
+        http_client: Any = None,
+    ) -> None:
         self.analysis_webhook_url = (analysis_webhook_url or "").strip()
         self.activity_webhook_url = (activity_webhook_url or "").strip()
+        # httpx.Client de vida longa: reaproveita a conexao TLS com o webhook entre cards.
+        self.http_client = http_client
 
     def analysis_enabled(self) -> bool:
         return bool(self.analysis_webhook_url)
@@ -80,23 +87,23 @@ class TeamsNotifier:
             ],
         }
         data = json.dumps(envelope).encode("utf-8")
-        request = urllib.request.Request(
-            webhook_url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+        headers = {"Content-Type": "application/json"}
         logging.debug("Enviando Adaptive Card (%s) para Teams", context or "evento")
         try:
-            with urllib.request.urlopen(request, timeout=10) as response:
-                if response.status >= 300:
-                    logging.error(
-                        "Adaptive Card webhook retornou status %s ao enviar card (%s)",
-                        response.status,
-                        context or "evento",
-                    )
-                else:
-                    logging.debug("Adaptive Card entregue com sucesso (%s)", context or "evento")
+            if self.http_client is not None:
+                status = self.http_client.post(webhook_url, content=data, headers=headers, timeout=10).status_code
+            else:
+                request = urllib.request.Request(webhook_url, data=data, headers=headers, method="POST")
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    status = response.status
+            if status >= 300:
+                logging.error(
+                    "Adaptive Card webhook retornou status %s ao enviar card (%s)",
+                    status,
+                    context or "evento",
+                )
+            else:
+                logging.debug("Adaptive Card entregue com sucesso (%s)", context or "evento")
         except Exception as exc:
             logging.exception(
                 "Falha ao enviar Adaptive Card (%s): %s",
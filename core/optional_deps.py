@@ -0,0 +1,37 @@
+"""Lazy loaders for optional third-party libraries shared across the pipeline."""
+
+from typing import Any
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+# Bibliotecas pesadas (PyMuPDF, python-docx) sao importadas apenas no primeiro
+# documento que precisa delas; uma falha de import fica memorizada.
+_fitz_unavailable = False
+_docx_unavailable = False
+
+
+def import_fitz() -> Any:
+    global _fitz_unavailable
+    if _fitz_unavailable:
+        return None
+    try:
+        import fitz  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        _fitz_unavailable = True
+        return None
+    return fitz
+
+
+def import_docx_document() -> Any:
+    global _docx_unavailable
+    if _docx_unavailable:
+        return None
+    try:
+        from docx import Document  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        _docx_unavailable = True
+        return None
+    return Document
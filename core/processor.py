@@ -1,58 +1,171 @@
+import io
 import logging
+import multiprocessing
 import os
+import re
 import shutil
-import tempfile
 import textwrap
+import threading
 import time
 import uuid
 import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional, Tuple, List, TYPE_CHECKING
 
+from core.classification_cache import ClassificationCache, content_digest
 from core.gpt_core import GPTCore, GPTServiceUnavailable
 from core.knowledge_base import KnowledgeBase
+from core.optional_deps import import_docx_document, import_fitz
 from core.validator import Validator
 from core.taxonomy import TaxonomyRuleEngine
 
 if TYPE_CHECKING:
     from core.notifier import TeamsNotifier
 
-try:
-    import fitz  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    fitz = None  # type: ignore
-
-try:
-    from docx import Document  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    Document = None  # type: ignore
-
-
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
-
+MIN_TEXT_LENGTH = 20
+# Equivale a "not ch.isalnum()" por caractere (\w = alfanumerico Unicode + "_").
+_SLUG_INVALID_CHAR = re.compile(r"\W")
+# Textos extraidos recentemente (chave: caminho, mtime, tamanho) para evitar
+# reprocessar o mesmo arquivo quando ele volta para a fila (ex.: GPT indisponivel).
+TEXT_CACHE_SIZE = 16
+# PDFs acima deste numero de paginas tem a extracao dividida entre processos.
+PDF_PARALLEL_MIN_PAGES = 50
+PDF_PARALLEL_MAX_WORKERS = 4
+
+# Blocos fixos do feedback.txt, montados uma unica vez.
+_FEEDBACK_REVIEW_QUESTIONS = "\n".join(
+    [
+        "",
+        "# Perguntas principais para o revisor humano:",
+        "# 1) A categoria principal está correta?",
+        "# 2) Quais categorias adicionais devem ser mantidas como secundarias?",
+        "# 3) Cole os trechos do documento que justificam cada categoria e informe se devem treinar o acervo.",
+    ]
+)
+_FEEDBACK_FORM_TEMPLATE = "\n".join(
+    [
+        "",
+        "documento: {name}",
+        "status: correto | incorreto",
+        "categoria_nome_{slug}: {category}  # nao alterar",
+        "confirmar_categoria_principal: sim | nao",
+        "trecho_evidencia_{slug}: ",
+        "acao_incluir_conhecimento_{slug}: sim | nao",
+        "justificativa_principal_usuario: ",
+        "confianca_revisada: ",
+        "nova_categoria: ",
+        "areas_secundarias: {secondary}",
+        "motivos_relevantes: ",
+        "motivos_criticos: ",
+        "palavras_relevantes: ",
+        "palavras_irrelevantes: ",
+        "aprovar_para_conhecimento: sim | nao",
+        "marcar_reanalise: sim | nao",
+        "categoria_feedback: {category}",
+        "",
+        "observacoes:",
+    ]
+)
+_FEEDBACK_FOOTER = "\n".join(
+    [
+        "",
+        "# Cole apenas trechos literais do documento nos campos 'trecho_evidencia_*'.",
+        "# Marque 'acao_incluir_conhecimento_*' = sim apenas quando o trecho puder treinar o acervo da categoria.",
+        "# Utilize 'areas_secundarias' para listar as categorias confirmadas (separadas por virgula).",
+    ]
+)
+
+
+def _pdf_page_range_text(source: str, start: int, stop: int, flags: int) -> List[str]:
+    """Extract the text of pages ``[start, stop)`` of the PDF at ``source``; runs inside a worker process."""
+    fitz = import_fitz()
+    with fitz.open(source) as doc:
+        return [doc[index].get_textpage(flags=flags).extractText() for index in range(start, stop)]
+
+
+# Pool unico de processos para PDFs grandes, compartilhado por todas as threads de processamento:
+# no maximo PDF_PARALLEL_MAX_WORKERS processos no total. "spawn" evita fork de um processo cheio
+# de threads e locks (listener de log, sqlite, pools httpx).
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pdf_worker_count() -> int:
+    return min(PDF_PARALLEL_MAX_WORKERS, os.cpu_count() or 1)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_pdf_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _shutdown_pdf_pool(wait: bool = True) -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+@dataclass(slots=True)
+class _StageRecord:
+    stage: str
+    status: str
+    timestamp: float
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"stage": self.stage, "status": self.status, "timestamp": self.timestamp}
+        if self.status != "started":
+            data["duration"] = self.duration
+        if self.error is not None:
+            data["error"] = self.error
+        if self.extra is not None:
+            data["extra"] = self.extra
+        return data
 
 class _ProcessingTimeline:
-    """Helper to consolidate stage logging and structured events."""
+    """Helper to consolidate stage logging and structured events.
+
+    With ``batched=True`` stage transitions are only recorded and published in
+    a single ``processing_stages_batch`` event when :meth:`finish` runs.
+    """
 
     def __init__(
         self,
         file_name: str,
         processing_id: str,
         emitter: Optional[Callable[[str, Dict[str, Any]], None]],
+        batched: bool = True,
     ) -> None:
         self.file_name = file_name
         self.processing_id = processing_id
         self._emitter = emitter
+        self.batched = batched
         self._stage_start: Dict[str, float] = {}
         self._started_at = time.perf_counter()
-        self._records: List[Dict[str, Any]] = []
+        self._records: List[_StageRecord] = []
+        self._finished = False
 
     def emit(self, event_type: str, payload: Optional[Dict[str, Any]] = None) -> None:
         if not self._emitter:
             return
         record = {"processing_id": self.processing_id, "file": self.file_name}
         if payload:
-            record.update(payload)
+            record |= payload
         try:
             self._emitter(event_type, record)
         except Exception as exc:  # pragma: no cover - defensive
@@ -63,6 +176,19 @@ class _ProcessingTimeline:
                 exc,
             )
 
+    def start(self, path: str, extension: str, size_bytes: int) -> None:
+        logging.info(
+            "[%s] Iniciando processamento de %s (extensao=%s, tamanho=%s bytes).",
+            self.processing_id,
+            self.file_name,
+            extension or "desconhecida",
+            size_bytes,
+        )
+        self.emit(
+            "processing_started",
+            {"path": path, "extension": extension, "size_bytes": size_bytes},
+        )
+
     def stage_start(self, stage: str, extra: Optional[Dict[str, Any]] = None) -> None:
         self._stage_start[stage] = time.perf_counter()
         logging.info(
@@ -71,22 +197,16 @@ class _ProcessingTimeline:
             stage,
             self.file_name,
         )
-        payload = {"stage": stage, "status": "started"}
-        if extra:
-            payload.update(extra)
-        self.emit("processing_stage", payload)
-        self._records.append(
-            {
-                "stage": stage,
-                "status": "started",
-                "timestamp": time.time(),
-                "extra": dict(extra or {}),
-            }
-        )
+        if not self.batched:
+            payload = {"stage": stage, "status": "started"}
+            if extra:
+                payload |= extra
+            self.emit("processing_stage", payload)
+        self._records.append(_StageRecord(stage, "started", time.time(), extra=dict(extra or {})))
 
     def stage_end(self, stage: str, extra: Optional[Dict[str, Any]] = None) -> None:
         start_time = self._stage_start.pop(stage, None)
-        duration = time.perf_counter() - start_time if start_time else None
+        duration = time.perf_counter() - start_time if start_time is not None else None
         detail = ""
         if extra:
             joined = ", ".join(f"{key}={value}" for key, value in extra.items())
@@ -106,25 +226,26 @@ class _ProcessingTimeline:
                 stage,
                 detail,
             )
-        payload = {"stage": stage, "status": "completed"}
-        if duration is not None:
-            payload["duration"] = round(duration, 3)
-        if extra:
-            payload.update(extra)
-        self.emit("processing_stage", payload)
+        if not self.batched:
+            payload = {"stage": stage, "status": "completed"}
+            if duration is not None:
+                payload["duration"] = round(duration, 3)
+            if extra:
+                payload |= extra
+            self.emit("processing_stage", payload)
         self._records.append(
-            {
-                "stage": stage,
-                "status": "completed",
-                "timestamp": time.time(),
-                "duration": round(duration, 3) if duration is not None else None,
-                "extra": dict(extra or {}),
-            }
+            _StageRecord(
+                stage,
+                "completed",
+                time.time(),
+                duration=round(duration, 3) if duration is not None else None,
+                extra=dict(extra or {}),
+            )
         )
 
     def stage_error(self, stage: str, error: Exception) -> None:
         start_time = self._stage_start.pop(stage, None)
-        duration = time.perf_counter() - start_time if start_time else None
+        duration = time.perf_counter() - start_time if start_time is not None else None
         if duration is not None:
             logging.error(
                 "[%s] Etapa '%s' falhou apos %.2fs: %s",
@@ -140,21 +261,26 @@ class _ProcessingTimeline:
                 stage,
                 error,
             )
-        payload = {"stage": stage, "status": "error", "error": str(error)}
-        if duration is not None:
-            payload["duration"] = round(duration, 3)
-        self.emit("processing_stage", payload)
+        if not self.batched:
+            payload = {"stage": stage, "status": "error", "error": str(error)}
+            if duration is not None:
+                payload["duration"] = round(duration, 3)
+            self.emit("processing_stage", payload)
         self._records.append(
-            {
-                "stage": stage,
-                "status": "error",
-                "timestamp": time.time(),
-                "duration": round(duration, 3) if duration is not None else None,
-                "error": str(error),
-            }
+            _StageRecord(
+                stage,
+                "error",
+                time.time(),
+                duration=round(duration, 3) if duration is not None else None,
+                error=str(error),
+            )
         )
 
     def finish(self, success: bool, extra: Optional[Dict[str, Any]] = None) -> None:
+        # Idempotente: caminhos de falha podem chamar finish depois de um encerramento.
+        if self._finished:
+            return
+        self._finished = True
         duration = time.perf_counter() - self._started_at
         status = "success" if success else "error"
         logging.info(
@@ -166,20 +292,24 @@ class _ProcessingTimeline:
         )
         payload = {"status": status, "duration": round(duration, 3)}
         if extra:
-            payload.update(extra)
-        self.emit("processing_finished", payload)
+            payload |= extra
         self._records.append(
-            {
-                "stage": "pipeline",
-                "status": status,
-                "timestamp": time.time(),
-                "duration": round(duration, 3),
-                "extra": dict(extra or {}),
-            }
+            _StageRecord(
+                "pipeline",
+                status,
+                time.time(),
+                duration=round(duration, 3),
+                extra=dict(extra or {}),
+            )
         )
+        if self.batched:
+            payload["records"] = self.records()
+            self.emit("processing_stages_batch", payload)
+        else:
+            self.emit("processing_finished", payload)
 
     def records(self) -> List[Dict[str, Any]]:
-        return list(self._records)
+        return [record.to_dict() for record in self._records]
 
 
 class DocumentProcessor:
@@ -195,6 +325,9 @@ class DocumentProcessor:
         taxonomy_engine: Optional[TaxonomyRuleEngine] = None,
         teams_notifier: Optional["TeamsNotifier"] = None,
         storage_paths: Optional[Dict[str, Path]] = None,
+        batch_timeline_events: bool = True,
+        finalize_workers: int = 4,
+        classification_cache: Optional[ClassificationCache] = None,
     ):
         self.gpt_core = gpt_core
         self.validator = validator
@@ -212,6 +345,21 @@ class DocumentProcessor:
         self._event_emitter = event_emitter
         self.taxonomy_engine = taxonomy_engine
         self.teams_notifier = teams_notifier
+        self.batch_timeline_events = batch_timeline_events
+        self.classification_cache = classification_cache
+        self._finalizer = ThreadPoolExecutor(
+            max_workers=max(1, int(finalize_workers)),
+            thread_name_prefix="processor-finalizer",
+        )
+        self._text_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._text_cache_lock = threading.Lock()
+        self._known_categories_cache: Optional[Tuple[int, List[str]]] = None
+        self._known_categories_lock = threading.Lock()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Wait for pending background finalizations (bundle + notifications)."""
+        self._finalizer.shutdown(wait=wait)
+        _shutdown_pdf_pool(wait=wait)
 
     def _emit_event(self, event_type: str, payload: Optional[Dict[str, Any]] = None) -> None:
         if not self._event_emitter:
@@ -225,27 +373,39 @@ class DocumentProcessor:
     # Public API
     # ------------------------------------------------------------------
 
-    def process_file(self, file_path: str, processing_id: Optional[str] = None) -> Optional[Path]:
+    def process_file(self, file_path: str, processing_id: Optional[str] = None) -> Optional["Future[Path]"]:
+        """Classify ``file_path``; bundle and notifications finish in the background.
+
+        Returns a Future resolved with the ZIP path once the bundle exists (or carrying the
+        finalization error), or None when the document was skipped or sent back for retry.
+        """
         path = Path(file_path)
         proc_id = processing_id or uuid.uuid4().hex[:12]
         suffix = path.suffix.lower()
-        size_bytes = path.stat().st_size if path.exists() else 0
-        timeline = _ProcessingTimeline(path.name, proc_id, self._event_emitter)
-        timeline.emit(
-            "processing_started",
-            {"path": str(path), "extension": suffix, "size_bytes": size_bytes},
-        )
-        logging.info(
-            "[%s] Iniciando processamento de %s (extensao=%s, tamanho=%s bytes).",
-            proc_id,
-            path.name,
-            suffix or "desconhecida",
-            size_bytes,
-        )
         if suffix not in SUPPORTED_EXTENSIONS:
             logging.warning("[%s] Extensao nao suportada para %s. Ignorando.", proc_id, path)
-            timeline.finish(False, {"reason": "unsupported_extension"})
             return None
+        # Um unico stat: tamanho para o filtro e chave do cache de extracao.
+        try:
+            stat_result: Optional[os.stat_result] = path.stat()
+        except FileNotFoundError:
+            stat_result = None
+        size_bytes = stat_result.st_size if stat_result is not None else 0
+        if size_bytes < MIN_TEXT_LENGTH:
+            logging.warning(
+                "[%s] Arquivo %s muito pequeno (%s bytes) para analise. Ignorando.",
+                proc_id,
+                path.name,
+                size_bytes,
+            )
+            return None
+        timeline = _ProcessingTimeline(
+            path.name,
+            proc_id,
+            self._event_emitter,
+            batched=self.batch_timeline_events,
+        )
+        timeline.start(str(path), suffix, size_bytes)
 
         if self.teams_notifier:
             self.teams_notifier.send_activity_event(
@@ -263,7 +423,8 @@ class DocumentProcessor:
         try:
             timeline.stage_start("extracao_texto", {"extensao": suffix})
             try:
-                text = self._extract_text(path)
+                source_bytes = self._load_source_bytes(path)
+                text = self._extract_text(path, source_bytes, stat_result)
             except Exception as exc:
                 timeline.stage_error("extracao_texto", exc)
                 raise
@@ -275,69 +436,26 @@ class DocumentProcessor:
                 path.name,
                 len(text),
             )
-            if not text or len(text.strip()) < 20:
+            if not text or len(text.strip()) < MIN_TEXT_LENGTH:
                 logging.warning("[%s] Conteudo insuficiente em %s para analise.", proc_id, path.name)
                 timeline.finish(False, {"reason": "conteudo_insuficiente", "caracteres": len(text)})
                 return None
 
             metadata = {"file_name": path.name, "absolute_path": str(path)}
-
-            timeline.stage_start("analise_gpt")
-            try:
-                primary_result = self.gpt_core.analyze_document(text, metadata)
-            except GPTServiceUnavailable as exc:
-                timeline.stage_error("analise_gpt", exc)
-                logging.error("[%s] Falha ao acessar o GPT para %s: %s", proc_id, path.name, exc)
-                self._handle_gpt_failure(path, proc_id)
-                timeline.finish(False, {"reason": "gpt_indisponivel", "error": str(exc)})
-                return None
-            except Exception as exc:
-                timeline.stage_error("analise_gpt", exc)
-                raise
-            categoria_inicial = primary_result.get("categoria") or primary_result.get("categoria_principal")
-            confianca_inicial = primary_result.get("confidence_percent", primary_result.get("confianca", 0))
-            timeline.stage_end(
-                "analise_gpt",
-                {
-                    "categoria_inicial": categoria_inicial,
-                    "confianca_inicial": confianca_inicial,
-                },
-            )
-            try:
-                confianca_log = float(confianca_inicial)
-            except (TypeError, ValueError):
-                confianca_log = 0.0
-            logging.info(
-                "[%s] Resultado primario para %s: categoria=%s confianca=%.2f%%",
-                proc_id,
-                path.name,
-                categoria_inicial,
-                confianca_log,
-            )
-
-            timeline.stage_start("validacao")
-            try:
-                validated_result = self.validator.ensure_confidence(primary_result, text, metadata)
-            except Exception as exc:
-                timeline.stage_error("validacao", exc)
-                raise
-            confidence_validada = round(validated_result.get("confidence", 0.0) * 100, 2)
-            timeline.stage_end(
-                "validacao",
-                {
-                    "categoria_validada": validated_result.get("categoria"),
-                    "confianca_validada": confidence_validada,
-                    "tentativas_validacao": validated_result.get("validation_attempts"),
-                },
-            )
-            logging.info(
-                "[%s] Resultado validado para %s: categoria=%s confianca=%.2f%% (tentativas=%s)",
-                proc_id,
-                path.name,
-                validated_result.get("categoria"),
-                confidence_validada,
-                validated_result.get("validation_attempts"),
-            )
+            summary = self._build_summary(text)
+            summary_short = self._build_summary(text, limit=320)
+
+            digest = content_digest(source_bytes) if self.classification_cache is not None else None
+            cache_context = self._classification_context() if digest is not None else ""
+            validated_result = self._cached_classification(path, proc_id, timeline, digest, cache_context)
+            if validated_result is None:
+                validated_result = self._classify_with_gpt(path, proc_id, timeline, text, metadata)
+                if validated_result is None:
+                    return None
+                if digest is not None:
+                    self._store_classification(digest, cache_context, validated_result)
+            cat = validated_result.get("categoria")
+            conf = validated_result.get("confidence", 0.0)
             matches = validated_result.get("knowledge_matches") or []
             if matches:
                 top_log = "; ".join(
@@ -354,7 +472,7 @@ class DocumentProcessor:
                     refinement = self.taxonomy_engine.refine(
                         text=text,
                         validation_result=validated_result,
-                        known_categories=self.knowledge_base.known_categories(),
+                        known_categories=self._known_categories(),
                         knowledge_matches=matches,
                     )
                 except Exception as exc:
@@ -363,40 +481,45 @@ class DocumentProcessor:
                 else:
                     validated_result = refinement["result"]
                     taxonomy_report = refinement["report"]
-                    scores = taxonomy_report.get("scores", {})
+                    cat = validated_result.get("categoria")
+                    conf = validated_result.get("confidence", 0.0)
+                    scores = taxonomy_report.get("scores")
                     top_category = taxonomy_report.get("top_category")
+                    action = taxonomy_report.get("action")
+                    composite = taxonomy_report.get("composite_scores")
                     heur_score = 0.0
-                    if top_category and top_category in scores:
+                    if top_category and scores and top_category in scores:
                         heur_score = scores[top_category].get("score", 0.0)  # type: ignore[index]
                     timeline.stage_end(
                         "refinamento_taxonomia",
                         {
-                            "acao": taxonomy_report.get("action"),
-                            "categoria": validated_result.get("categoria"),
+                            "acao": action,
+                            "categoria": cat,
                             "score_heuristico": round(float(heur_score), 3),
                         },
                     )
-                    logging.info(
-                        "[%s] Heuristica taxonomica para %s: action=%s top=%s score=%.2f composite=%s",
-                        proc_id,
-                        path.name,
-                        taxonomy_report.get("action"),
-                        taxonomy_report.get("top_category"),
-                        taxonomy_report.get("top_score", 0.0),
-                        taxonomy_report.get("composite_scores"),
-                    )
+                    if logging.getLogger().isEnabledFor(logging.INFO):
+                        logging.info(
+                            "[%s] Heuristica taxonomica para %s: action=%s top=%s score=%.2f composite=%s",
+                            proc_id,
+                            path.name,
+                            action,
+                            top_category,
+                            taxonomy_report.get("top_score", 0.0),
+                            composite,
+                        )
                     self._emit_event(
                         "taxonomy_refinement",
                         {
                             "processing_id": proc_id,
                             "file": path.name,
-                            "action": taxonomy_report.get("action"),
-                            "top_category": taxonomy_report.get("top_category"),
-                            "scores": taxonomy_report.get("scores"),
-                            "composite": taxonomy_report.get("composite_scores"),
+                            "action": action,
+                            "top_category": top_category,
+                            "scores": scores,
+                            "composite": composite,
                         },
                     )
-            timeline.stage_start("resolucao_categoria", {"categoria": validated_result.get("categoria")})
+            timeline.stage_start("resolucao_categoria", {"categoria": cat})
             try:
                 category_folder, created_folder = self._resolve_category_folder(validated_result)
             except Exception as exc:
@@ -412,34 +535,19 @@ class DocumentProcessor:
                     "category_folder_created",
                     {
                         "processing_id": proc_id,
-                        "categoria": validated_result.get("categoria"),
+                        "categoria": cat,
                         "folder": str(category_folder),
                     },
                 )
-            logging.info(
-                "[%s] Gerando pacote final para %s na pasta %s",
-                proc_id,
-                path.name,
-                category_folder,
-            )
 
-            timeline.stage_start("geracao_pacote", {"pasta": str(category_folder)})
-            try:
-                zip_path = self._generate_bundle(path, text, validated_result, category_folder)
-            except Exception as exc:
-                timeline.stage_error("geracao_pacote", exc)
-                raise
-            timeline.stage_end("geracao_pacote", {"zip": str(zip_path)})
-            logging.info("[%s] Pacote gerado para %s em %s", proc_id, path.name, zip_path)
-
-            timeline.stage_start("atualizacao_conhecimento", {"categoria": validated_result.get("categoria")})
+            timeline.stage_start("atualizacao_conhecimento", {"categoria": cat})
             try:
                 entry = self.knowledge_base.add_entry(
                     file_name=path.name,
                     category=validated_result.get("categoria", "outros"),
                     theme=validated_result.get("tema", "Tema nao identificado"),
-                    confidence=validated_result.get("confidence", 0.0),
-                    summary=self._build_summary(text),
+                    confidence=conf,
+                    summary=summary,
                     justification=validated_result.get("justificativa", ""),
                     areas_secundarias=validated_result.get("areas_secundarias"),
                     raw_text=text,
@@ -447,6 +555,7 @@ class DocumentProcessor:
             except Exception as exc:
                 timeline.stage_error("atualizacao_conhecimento", exc)
                 raise
+            self._known_categories_cache = None
             timeline.stage_end(
                 "atualizacao_conhecimento",
                 {"categoria": entry.category, "confianca": round(entry.confidence * 100, 2)},
@@ -469,6 +578,196 @@ class DocumentProcessor:
                 },
             )
 
+            finalization = self._finalizer.submit(
+                self._finalize,
+                path,
+                proc_id,
+                timeline,
+                validated_result,
+                category_folder,
+                entry,
+                matches,
+                summary,
+                summary_short,
+                source_bytes,
+            )
+            finalization.add_done_callback(
+                lambda future, pid=proc_id, name=path.name: self._on_finalize_done(pid, name, future)
+            )
+            logging.info(
+                "[%s] Pacote e notificacoes de %s delegados para finalizacao em segundo plano.",
+                proc_id,
+                path.name,
+            )
+            return finalization
+        except Exception as exc:
+            self._handle_unexpected_failure(path, proc_id, timeline, exc)
+            raise
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _classify_with_gpt(
+        self,
+        path: Path,
+        proc_id: str,
+        timeline: _ProcessingTimeline,
+        text: str,
+        metadata: Dict[str, str],
+    ) -> Optional[Dict]:
+        """GPT analysis plus validator passes; None when the GPT service is unavailable."""
+        timeline.stage_start("analise_gpt")
+        try:
+            primary_result = self.gpt_core.analyze_document(text, metadata)
+        except GPTServiceUnavailable as exc:
+            timeline.stage_error("analise_gpt", exc)
+            logging.error("[%s] Falha ao acessar o GPT para %s: %s", proc_id, path.name, exc)
+            self._handle_gpt_failure(path, proc_id)
+            timeline.finish(False, {"reason": "gpt_indisponivel", "error": str(exc)})
+            return None
+        except Exception as exc:
+            timeline.stage_error("analise_gpt", exc)
+            raise
+        categoria_inicial = primary_result.get("categoria") or primary_result.get("categoria_principal")
+        confianca_inicial = primary_result.get("confidence_percent", primary_result.get("confianca", 0))
+        timeline.stage_end(
+            "analise_gpt",
+            {
+                "categoria_inicial": categoria_inicial,
+                "confianca_inicial": confianca_inicial,
+            },
+        )
+        try:
+            confianca_log = float(confianca_inicial)
+        except (TypeError, ValueError):
+            confianca_log = 0.0
+        logging.info(
+            "[%s] Resultado primario para %s: categoria=%s confianca=%.2f%%",
+            proc_id,
+            path.name,
+            categoria_inicial,
+            confianca_log,
+        )
+
+        timeline.stage_start("validacao")
+        try:
+            validated_result = self.validator.ensure_confidence(primary_result, text, metadata)
+        except Exception as exc:
+            timeline.stage_error("validacao", exc)
+            raise
+        cat = validated_result.get("categoria")
+        conf = validated_result.get("confidence", 0.0)
+        conf_pct = round(conf * 100, 2)
+        attempts = validated_result.get("validation_attempts")
+        timeline.stage_end(
+            "validacao",
+            {
+                "categoria_validada": cat,
+                "confianca_validada": conf_pct,
+                "tentativas_validacao": attempts,
+            },
+        )
+        logging.info(
+            "[%s] Resultado validado para %s: categoria=%s confianca=%.2f%% (tentativas=%s)",
+            proc_id,
+            path.name,
+            cat,
+            conf_pct,
+            attempts,
+        )
+        return validated_result
+
+    def _cached_classification(
+        self,
+        path: Path,
+        proc_id: str,
+        timeline: _ProcessingTimeline,
+        digest: Optional[str],
+        context: str,
+    ) -> Optional[Dict]:
+        if digest is None or self.classification_cache is None:
+            return None
+        # Documento marcado para reanalise via feedback volta a passar pelo GPT.
+        if self.knowledge_base.needs_reprocess(path.name):
+            return None
+        try:
+            cached = self.classification_cache.get(digest, context)
+        except Exception as exc:
+            logging.warning("[%s] Falha ao consultar cache de classificacao: %s", proc_id, exc)
+            return None
+        if cached is None:
+            return None
+        timeline.stage_start("cache_classificacao", {"digest": digest})
+        timeline.stage_end(
+            "cache_classificacao",
+            {"categoria": cached.get("categoria"), "confianca": cached.get("confidence_percent")},
+        )
+        logging.info(
+            "[%s] Conteudo de %s ja classificado (digest=%s); reutilizando categoria=%s sem chamar o GPT.",
+            proc_id,
+            path.name,
+            digest,
+            cached.get("categoria"),
+        )
+        return cached
+
+    def _classification_context(self) -> str:
+        """Cache scope: model + prompt version, and the amount of human feedback in the KB."""
+        # Cada feedback aplicado muda o contexto: classificacoes anteriores a correcao nao sao reaproveitadas.
+        return f"{self.gpt_core.cache_signature()}|feedback={self.knowledge_base.feedback_count}"
+
+    def _store_classification(self, digest: str, context: str, result: Dict) -> None:
+        try:
+            self.classification_cache.put(digest, context, result, model=self.gpt_core.config.get("model"))  # type: ignore[union-attr]
+        except Exception as exc:
+            logging.warning("Falha ao gravar cache de classificacao (%s): %s", digest, exc)
+
+    def _on_finalize_done(self, proc_id: str, file_name: str, future: "Future[Path]") -> None:
+        # A excecao de _finalize ja acionou _handle_unexpected_failure; aqui ela e registrada
+        # para nao se perder num future que ninguem consulta.
+        if future.cancelled():
+            logging.warning("[%s] Finalizacao de %s cancelada antes de gerar o pacote.", proc_id, file_name)
+            return
+        exc = future.exception()
+        if exc is not None:
+            logging.error("[%s] Finalizacao de %s falhou: %s", proc_id, file_name, exc)
+            self._emit_event(
+                "processing_finalize_failed",
+                {"processing_id": proc_id, "file": file_name, "error": str(exc)},
+            )
+
+    def _finalize(
+        self,
+        path: Path,
+        proc_id: str,
+        timeline: _ProcessingTimeline,
+        validated_result: Dict,
+        category_folder: Path,
+        entry: Any,
+        matches: List[Dict[str, Any]],
+        summary: str,
+        summary_short: str,
+        source_bytes: Optional[bytes] = None,
+    ) -> Path:
+        """Generate the bundle, notify Teams and release the working file (runs off the critical path)."""
+        try:
+            logging.info(
+                "[%s] Gerando pacote final para %s na pasta %s",
+                proc_id,
+                path.name,
+                category_folder,
+            )
+            timeline.stage_start("geracao_pacote", {"pasta": str(category_folder)})
+            try:
+                zip_path = self._generate_bundle(
+                    path, validated_result, category_folder, summary, source_bytes
+                )
+            except Exception as exc:
+                timeline.stage_error("geracao_pacote", exc)
+                raise
+            timeline.stage_end("geracao_pacote", {"zip": str(zip_path)})
+            logging.info("[%s] Pacote gerado para %s em %s", proc_id, path.name, zip_path)
+
             timeline.finish(True, {"categoria": entry.category, "artifact": str(zip_path)})
             timeline_records = timeline.records()
             self._emit_event(
@@ -489,16 +788,17 @@ class DocumentProcessor:
                     if record["status"] == "completed" and record.get("duration") is not None
                 ),
             )
+            conf_pct = validated_result.get("confidence", 0.0) * 100
             notification_payload = {
                 "file_name": path.name,
                 "zip_path": str(zip_path),
                 "category": entry.category,
                 "theme": validated_result.get("tema"),
-                "confidence_percent": validated_result.get("confidence", 0.0) * 100,
+                "confidence_percent": conf_pct,
                 "taxonomy": validated_result.get("taxonomy_report"),
                 "knowledge_matches": matches,
                 "timeline": timeline_records,
-                "summary": self._build_summary(text, limit=320),
+                "summary": summary_short,
             }
             if self.teams_notifier:
                 try:
@@ -517,7 +817,7 @@ class DocumentProcessor:
                         facts=[
                             ("Processo", proc_id),
                             ("Categoria", entry.category),
-                            ("Confianca", f"{validated_result.get('confidence', 0.0) * 100:.2f}%"),
+                            ("Confianca", f"{conf_pct:.2f}%"),
                             ("Artefato", str(zip_path)),
                         ],
                         link=str(zip_path),
@@ -530,63 +830,162 @@ class DocumentProcessor:
                 path.unlink()
             except OSError as exc:
                 logging.error("[%s] Falha ao remover arquivo temporario %s: %s", proc_id, path, exc)
+            self._forget_extracted_text(path)
             return zip_path
         except Exception as exc:
             self._handle_unexpected_failure(path, proc_id, timeline, exc)
             raise
-    # ------------------------------------------------------------------
-    # Internal helpers
-    # ------------------------------------------------------------------
-    def _extract_text(self, path: Path) -> str:
+
+    def _known_categories(self) -> List[str]:
+        revision = getattr(self.knowledge_base, "revision", None)
+        with self._known_categories_lock:
+            cached = self._known_categories_cache
+            if revision is not None and cached is not None and cached[0] == revision:
+                return cached[1]
+            categories = self.knowledge_base.known_categories()
+            if revision is not None:
+                self._known_categories_cache = (revision, categories)
+            return categories
+
+    def _load_source_bytes(self, path: Path) -> bytes:
+        # Lido uma unica vez: alimenta o extrator e o pacote final.
+        with open(path, "rb") as handler:
+            return handler.read()
+
+    def _extract_text(
+        self,
+        path: Path,
+        data: Optional[bytes] = None,
+        stat: Optional[os.stat_result] = None,
+    ) -> str:
+        if stat is None:
+            try:
+                stat = path.stat()
+            except OSError:
+                return self._extract_text_uncached(path, data)
+        cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._text_cache_lock:
+            cached = self._text_cache.get(cache_key)
+            if cached is not None:
+                self._text_cache.move_to_end(cache_key)
+                logging.info("Texto de %s reaproveitado do cache de extracao.", path.name)
+                return cached
+        text = self._extract_text_uncached(path, data)
+        if text:
+            with self._text_cache_lock:
+                self._text_cache[cache_key] = text
+                while len(self._text_cache) > TEXT_CACHE_SIZE:
+                    self._text_cache.popitem(last=False)
+        return text
+
+    def _forget_extracted_text(self, path: Path) -> None:
+        key_path = str(path)
+        with self._text_cache_lock:
+            for key in [key for key in self._text_cache if key[0] == key_path]:
+                del self._text_cache[key]
+
+    def _extract_text_uncached(self, path: Path, data: Optional[bytes] = None) -> str:
         suffix = path.suffix.lower()
         if suffix == ".pdf":
-            return self._read_pdf(path)
+            return self._read_pdf(path, data)
         if suffix == ".docx":
-            return self._read_docx(path)
+            return self._read_docx(path, data)
         if suffix == ".txt":
-            return self._read_txt(path)
+            return self._read_txt(path, data)
         return ""
 
-    def _read_pdf(self, path: Path) -> str:
+    def _read_pdf(self, path: Path, data: Optional[bytes] = None) -> str:
+        fitz = import_fitz()
         if fitz is None:
             logging.error("PyMuPDF (fitz) não está instalado. Não é possível processar PDFs.")
             return ""
         try:
             logging.info("Abrindo PDF %s para extracao de texto", path.name)
-            with fitz.open(path) as doc:
-                text = "\n".join(page.get_text("text") for page in doc)
-                logging.info("PDF %s extraido com %s paginas", path.name, doc.page_count)
-                return text
+            # Flags minimas: sem imagens/ligaduras, apenas texto corrido por pagina.
+            flags = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_DEHYPHENATE | fitz.TEXT_MEDIABOX_CLIP
+            source = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(path)
+            with source as doc:
+                page_count = doc.page_count
+                parts: Optional[List[str]] = None
+                if page_count > PDF_PARALLEL_MIN_PAGES:
+                    parts = self._read_pdf_parallel(path, data, page_count, flags)
+                if parts is None:
+                    parts = []
+                    for page in doc:
+                        textpage = page.get_textpage(flags=flags)
+                        parts.append(textpage.extractText())
+                        del textpage
+                logging.info("PDF %s extraido com %s paginas", path.name, page_count)
+                return "\n".join(parts)
         except Exception as exc:  # pragma: no cover - runtime dependent
             logging.error("Erro ao ler PDF %s: %s", path.name, exc)
             return ""
 
-    def _read_docx(self, path: Path) -> str:
+    def _read_pdf_parallel(
+        self,
+        path: Path,
+        data: Optional[bytes],
+        page_count: int,
+        flags: int,
+    ) -> Optional[List[str]]:
+        # MuPDF nao e thread-safe: cada processo abre sua propria copia do documento a partir do
+        # caminho (o conteudo nao e serializado para os filhos).
+        workers = _pdf_worker_count()
+        if workers < 2 or not path.is_file():
+            return None
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        try:
+            pool = _get_pdf_pool()
+            futures = [pool.submit(_pdf_page_range_text, str(path), start, stop, flags) for start, stop in ranges]
+            parts: List[str] = []
+            for future in futures:
+                parts.extend(future.result())
+        except BrokenProcessPool as exc:
+            logging.warning("Pool de extracao de PDF interrompido (%s); sera recriado.", exc)
+            _shutdown_pdf_pool(wait=False)
+            return None
+        except Exception as exc:
+            logging.warning(
+                "Extracao paralela do PDF %s falhou (%s); seguindo de forma sequencial.",
+                path.name,
+                exc,
+            )
+            return None
+        logging.info("PDF %s extraido em paralelo (%s faixas de paginas).", path.name, len(ranges))
+        return parts
+
+    def _read_docx(self, path: Path, data: Optional[bytes] = None) -> str:
+        Document = import_docx_document()
         if Document is None:
             logging.error("python-docx não está instalado. Não é possível processar DOCX.")
             return ""
         try:
             logging.info("Abrindo DOCX %s para extracao de texto", path.name)
-            document = Document(path)
-            paragraphs = [p.text for p in document.paragraphs if p.text.strip()]
+            document = Document(io.BytesIO(data) if data is not None else path)
+            # isspace() evita criar a copia de strip(); .text e montado uma unica vez.
+            paragraphs = [t for t in (p.text for p in document.paragraphs) if t and not t.isspace()]
             logging.info("DOCX %s contem %s paragrafos relevantes", path.name, len(paragraphs))
             return "\n".join(paragraphs)
         except Exception as exc:  # pragma: no cover - runtime dependent
             logging.error("Erro ao ler DOCX %s: %s", path.name, exc)
             return ""
 
-    def _read_txt(self, path: Path) -> str:
+    def _read_txt(self, path: Path, data: Optional[bytes] = None) -> str:
         try:
             logging.info("Lendo arquivo TXT %s (UTF-8)", path.name)
-            with open(path, "r", encoding="utf-8") as handler:
-                return handler.read()
-        except UnicodeDecodeError:
-            logging.info("Reprocessando TXT %s com codificacao latin-1", path.name)
-            with open(path, "r", encoding="latin-1") as handler:
-                return handler.read()
+            raw = data if data is not None else path.read_bytes()
         except Exception as exc:
             logging.error("Erro ao ler TXT %s: %s", path.name, exc)
             return ""
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            # Reaproveita os bytes ja lidos em vez de reler o arquivo do disco.
+            logging.info("Reprocessando TXT %s com codificacao latin-1", path.name)
+            text = raw.decode("latin-1")
+        # Mesmo tratamento de quebras de linha do modo texto do open().
+        return text.replace("\r\n", "\n").replace("\r", "\n")
 
     def _resolve_category_folder(self, result: Dict) -> Tuple[Path, bool]:
         category = result.get("categoria") or result.get("categoria_principal") or "outros"
@@ -597,31 +996,56 @@ class DocumentProcessor:
         return target_folder, not existed
 
     def _slugify(self, text: str) -> str:
-        cleaned = "".join(ch if ch.isalnum() else "_" for ch in text.lower())
-        cleaned = cleaned.strip("_")
+        cleaned = _SLUG_INVALID_CHAR.sub("_", text.lower()).strip("_")
         return cleaned or "outros"
 
-    def _generate_bundle(self, source_path: Path, text: str, result: Dict, category_folder: Path) -> Path:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            analysis_path = Path(tmpdir) / "analise.txt"
-            feedback_path = Path(tmpdir) / "feedback.txt"
-            logging.info("Escrevendo arquivos auxiliares (analise.txt, feedback.txt) para %s", source_path.name)
-            self._write_analysis_file(analysis_path, source_path, text, result)
-            self._write_feedback_file(feedback_path, source_path, result)
-
-            zip_name = f"{source_path.stem}.zip"
-            destination_zip = category_folder / zip_name
-            temp_zip = Path(tmpdir) / zip_name
+    def _bundle_path(self, source_path: Path, category_folder: Path) -> Path:
+        return category_folder / f"{source_path.stem}.zip"
 
-            logging.info("Compactando arquivos em %s", temp_zip)
-            with zipfile.ZipFile(temp_zip, "w", zipfile.ZIP_DEFLATED) as bundle:
-                bundle.write(source_path, arcname=source_path.name)
-                bundle.write(analysis_path, arcname="analise.txt")
-                bundle.write(feedback_path, arcname="feedback.txt")
-
-            shutil.move(str(temp_zip), destination_zip)
-            logging.info("Pacote %s movido para %s", zip_name, destination_zip)
-            return destination_zip
+    def _generate_bundle(
+        self,
+        source_path: Path,
+        result: Dict,
+        category_folder: Path,
+        summary: str,
+        source_bytes: Optional[bytes] = None,
+    ) -> Path:
+        logging.info("Gerando conteudo auxiliar (analise.txt, feedback.txt) para %s", source_path.name)
+        analysis_text = self._render_analysis_report(source_path, result, summary)
+        feedback_text = self._render_feedback_template(source_path, result)
+
+        destination_zip = self._bundle_path(source_path, category_folder)
+        zip_name = destination_zip.name
+        # Escrito direto na pasta final e renomeado ao fim: rename atomico no
+        # mesmo filesystem, sem a copia extra de um shutil.move entre discos.
+        partial_zip = destination_zip.with_name(f"{zip_name}.part")
+
+        logging.info("Compactando arquivos em %s", partial_zip)
+        try:
+            # O original (PDF/DOCX) ja vem comprimido; recomprimir so gasta CPU.
+            with zipfile.ZipFile(partial_zip, "w", zipfile.ZIP_STORED) as bundle:
+                if source_bytes is not None:
+                    bundle.writestr(source_path.name, source_bytes, compress_type=zipfile.ZIP_STORED)
+                else:
+                    bundle.write(source_path, arcname=source_path.name, compress_type=zipfile.ZIP_STORED)
+                bundle.writestr(
+                    "analise.txt",
+                    analysis_text,
+                    compress_type=zipfile.ZIP_DEFLATED,
+                    compresslevel=1,
+                )
+                bundle.writestr(
+                    "feedback.txt",
+                    feedback_text,
+                    compress_type=zipfile.ZIP_DEFLATED,
+                    compresslevel=1,
+                )
+            os.replace(partial_zip, destination_zip)
+        except BaseException:
+            partial_zip.unlink(missing_ok=True)
+            raise
+        logging.info("Pacote %s gravado em %s", zip_name, destination_zip)
+        return destination_zip
 
     def _handle_gpt_failure(self, processing_path: Path, proc_id: str) -> None:
         entrada_path = self.input_folder / processing_path.name
@@ -666,39 +1090,42 @@ class DocumentProcessor:
                 "error": str(error),
             },
         )
-        if processing_path.exists():
-            failure_dir = self.processing_fail_folder
-            failure_dir.mkdir(parents=True, exist_ok=True)
-            destination = failure_dir / processing_path.name
-            try:
-                shutil.move(str(processing_path), destination)
-                logging.info(
-                    "[%s] Arquivo %s movido para pasta de falhas: %s",
-                    proc_id,
-                    processing_path.name,
-                    destination,
-                )
-            except Exception as move_err:
-                logging.error(
-                    "[%s] Falha ao mover %s para pasta de falhas: %s",
-                    proc_id,
-                    processing_path,
-                    move_err,
-                )
-            if self.teams_notifier:
-                self.teams_notifier.send_activity_event(
-                    title="Processamento falhou",
-                    message=f"{processing_path.name} falhou durante o pipeline e foi movido para a pasta de falhas.",
-                    facts=[
-                        ("Processo", proc_id),
-                        ("Destino", str(destination)),
-                        ("Erro", str(error)),
-                    ],
-                    event_type="processing_failed",
-                )
+        failure_dir = self.processing_fail_folder
+        failure_dir.mkdir(parents=True, exist_ok=True)
+        destination = failure_dir / processing_path.name
+        try:
+            shutil.move(str(processing_path), destination)
+        except FileNotFoundError:
+            # Arquivo ja removido/movido: nada a mover nem notificar.
+            return
+        except Exception as move_err:
+            logging.error(
+                "[%s] Falha ao mover %s para pasta de falhas: %s",
+                proc_id,
+                processing_path,
+                move_err,
+            )
+        else:
+            logging.info(
+                "[%s] Arquivo %s movido para pasta de falhas: %s",
+                proc_id,
+                processing_path.name,
+                destination,
+            )
+        if self.teams_notifier:
+            self.teams_notifier.send_activity_event(
+                title="Processamento falhou",
+                message=f"{processing_path.name} falhou durante o pipeline e foi movido para a pasta de falhas.",
+                facts=[
+                    ("Processo", proc_id),
+                    ("Destino", str(destination)),
+                    ("Erro", str(error)),
+                ],
+                event_type="processing_failed",
+            )
 
 
-    def _write_analysis_file(self, target: Path, source_path: Path, text: str, result: Dict) -> None:
+    def _render_analysis_report(self, source_path: Path, result: Dict, summary: str) -> str:
         confidence_ratio = result.get("confidence", 0.0)
         confidence_percent = result.get("confidence_percent", round(confidence_ratio * 100, 2))
         validation_attempts = result.get("validation_attempts", 0)
@@ -864,13 +1291,11 @@ class DocumentProcessor:
 
         lines.append("")
         lines.append("Resumo do texto analisado:")
-        lines.append(self._build_summary(text))
-
-        with open(target, "w", encoding="utf-8") as handler:
-            handler.write("\n".join(lines))
+        lines.append(summary)
+        return "\n".join(lines)
 
 
-    def _write_feedback_file(self, target: Path, source_path: Path, result: Dict) -> None:
+    def _render_feedback_template(self, source_path: Path, result: Dict) -> str:
         def _slug(value: str) -> str:
             cleaned = "".join(ch.lower() if ch.isalnum() else "_" for ch in value or "")
             return "_".join(part for part in cleaned.split("_") if part)
@@ -955,35 +1380,14 @@ class DocumentProcessor:
             if inferencia:
                 template.extend(_wrap_comment(f"Inferencia: {inferencia}", prefix="#   "))
 
-        template.append("")
-        template.append("# Perguntas principais para o revisor humano:")
-        template.append("# 1) A categoria principal está correta?")
-        template.append("# 2) Quais categorias adicionais devem ser mantidas como secundarias?")
-        template.append("# 3) Cole os trechos do documento que justificam cada categoria e informe se devem treinar o acervo.")
-
-        template.extend(
-            [
-                "",
-                f"documento: {source_path.name}",
-                "status: correto | incorreto",
-                f"categoria_nome_{primary_slug}: {primary_category}  # nao alterar",
-                "confirmar_categoria_principal: sim | nao",
-                f"trecho_evidencia_{primary_slug}: ",
-                f"acao_incluir_conhecimento_{primary_slug}: sim | nao",
-                "justificativa_principal_usuario: ",
-                "confianca_revisada: ",
-                "nova_categoria: ",
-                f"areas_secundarias: {', '.join(secondary_areas) if secondary_areas else ''}",
-                "motivos_relevantes: ",
-                "motivos_criticos: ",
-                "palavras_relevantes: ",
-                "palavras_irrelevantes: ",
-                "aprovar_para_conhecimento: sim | nao",
-                "marcar_reanalise: sim | nao",
-                f"categoria_feedback: {primary_category}",
-                "",
-                "observacoes:",
-            ]
+        template.append(_FEEDBACK_REVIEW_QUESTIONS)
+        template.append(
+            _FEEDBACK_FORM_TEMPLATE.format(
+                name=source_path.name,
+                slug=primary_slug,
+                category=primary_category,
+                secondary=", ".join(secondary_areas) if secondary_areas else "",
+            )
         )
 
         candidate_order: List[str] = []
@@ -1072,19 +1476,16 @@ class DocumentProcessor:
         else:
             template.append("#   Documental: ainda sem arquivos reais associados.")
 
-        template.extend(
-            [
-                "",
-                "# Cole apenas trechos literais do documento nos campos 'trecho_evidencia_*'.",
-                "# Marque 'acao_incluir_conhecimento_*' = sim apenas quando o trecho puder treinar o acervo da categoria.",
-                "# Utilize 'areas_secundarias' para listar as categorias confirmadas (separadas por virgula).",
-            ]
-        )
+        template.append(_FEEDBACK_FOOTER)
 
-        with open(target, "w", encoding="utf-8") as handler:
-            handler.write("\n".join(template))
+        return "\n".join(template)
 
     def _build_summary(self, text: str, limit: int = 600) -> str:
+        # O inicio normalizado e prefixo do texto completo normalizado: se ja
+        # passa do limite, o resumo sai dele sem percorrer o documento inteiro.
+        head = " ".join(text[: limit * 8].split())
+        if len(head) > limit:
+            return head[:limit] + "..."
         sanitized = " ".join(text.split())
         if len(sanitized) <= limit:
             return sanitized
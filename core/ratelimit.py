@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Requests-per-minute / tokens-per-minute limiter shared by every LLM call."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, recovery_seconds: float = 60.0) -> None:
+        self.rpm = max(0.0, float(rpm or 0))
+        self.tpm = max(0.0, float(tpm or 0))
+        self.recovery_seconds = max(1.0, float(recovery_seconds))
+        self._lock = threading.Lock()
+        self._requests = self.rpm
+        self._tokens = self.tpm
+        self._updated = time.monotonic()
+        # Fator multiplicativo aplicado as taxas apos um 429 (AIMD).
+        self._factor = 1.0
+        self._penalty_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request (and ``tokens`` tokens) fit in the budget."""
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                needed_tokens = min(float(tokens), self.tpm) if self.tpm else 0.0
+                wait = 0.0
+                if self.rpm and self._requests < 1.0:
+                    wait = max(wait, (1.0 - self._requests) / self._rate(self.rpm))
+                if self.tpm and self._tokens < needed_tokens:
+                    wait = max(wait, (needed_tokens - self._tokens) / self._rate(self.tpm))
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1.0
+                    if self.tpm:
+                        self._tokens -= needed_tokens
+                    return
+            time.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """Halve the effective rate after a 429; it recovers linearly once ``retry_after`` elapses."""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._factor = max(0.1, self._factor / 2)
+            self._penalty_until = now + (retry_after if retry_after and retry_after > 0 else 10.0)
+            self._requests = min(self._requests, 0.0)
+            logging.warning(
+                "Limite de taxa do provedor atingido; reduzindo vazao para %.0f%% por %.1fs.",
+                self._factor * 100,
+                self._penalty_until - now,
+            )
+
+    def _rate(self, per_minute: float) -> float:
+        return per_minute * self._factor / 60.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if elapsed <= 0:
+            return
+        if self._factor < 1.0 and now > self._penalty_until:
+            self._factor = min(1.0, self._factor + elapsed / self.recovery_seconds)
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self._rate(self.rpm))
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self._rate(self.tpm))
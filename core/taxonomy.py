@@ -1,14 +1,57 @@
 import math
+import operator
+import re
+import sys
 import unicodedata
-from typing import Dict, List, Tuple
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None  # type: ignore
+
+
+# Mesmo conjunto removido pelo filtro "not (isalnum() or isspace())" por caractere.
+_DISCARD_CHARS = re.compile(r"[^\w\s]|_")
 
 
 def _normalize_text(value: str) -> str:
     normalized = unicodedata.normalize("NFKD", value or "")
-    ascii_only = "".join(ch for ch in normalized if ch.isalnum() or ch.isspace())
+    ascii_only = _DISCARD_CHARS.sub("", normalized)
     return " ".join(ascii_only.lower().split())
 
 
+# knowledge_matches vem de KnowledgeBase.category_match_report, que sempre preenche "best_match".
+_BEST_MATCH = operator.itemgetter("best_match")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_label(value: str) -> str:
+    """Cached variant for short, repeated strings (category names, aliases)."""
+    return sys.intern(_normalize_text(value))
+
+
+KeywordTable = Tuple[Tuple[str, float], ...]
+
+
+def _score_inner(
+    normalized: str,
+    keywords: KeywordTable,
+    counts: Optional[Dict[str, int]] = None,
+) -> Tuple[float, Counter]:
+    """Weighted keyword score plus per-keyword hits (counts from the automaton, or str.count)."""
+    score = 0.0
+    hits: Counter = Counter()
+    for keyword, weight in keywords:
+        occurrences = counts.get(keyword, 0) if counts is not None else normalized.count(keyword)
+        if occurrences:
+            score += weight * occurrences
+            hits[keyword] = occurrences
+    return score, hits
+
+
 class TaxonomyRuleEngine:
     """Rule-based reinforcement layer to augment GPT and knowledge-base decisions."""
 
@@ -111,39 +154,84 @@ class TaxonomyRuleEngine:
             "human resources": "recursos humanos / saude ocupacional",
             "seguranca e saude": "recursos humanos / saude ocupacional",
         }
+        # Chaves ja normalizadas: _resolve_alias vira um unico lookup.
+        self._normalized_alias_map = {
+            _normalize_label(alias): target for alias, target in self.alias_map.items()
+        }
+        self._normalized_profile_keys = {
+            _normalize_label(category): category for category in self.category_profiles
+        }
+        # Ultima lista de categorias conhecidas e seu indice normalizado; o processador
+        # reaproveita a mesma lista enquanto a base de conhecimento nao muda.
+        self._known_lookup_cache: Tuple[object, Dict[str, str]] = (None, {})
         self.promote_threshold = 1.8
         self.new_category_threshold = 2.5
         self.high_confidence_threshold = 5.0
+        # Perfis congelados em tuplas (palavra, peso) para o laco de pontuacao.
+        self._keyword_tables: Dict[str, Tuple[KeywordTable, KeywordTable]] = {
+            category: (
+                tuple(profile.get("keywords", {}).items()),
+                tuple(profile.get("negative_keywords", {}).items()),
+            )
+            for category, profile in self.category_profiles.items()
+        }
+        self._automaton = self._build_automaton()
+
+    def _build_automaton(self) -> Optional[object]:
+        """Single automaton over every (negative) keyword; None without pyahocorasick."""
+        if ahocorasick is None:
+            return None
+        automaton = ahocorasick.Automaton()
+        for profile in self.category_profiles.values():
+            for group in ("keywords", "negative_keywords"):
+                for keyword in profile.get(group, {}):
+                    if keyword not in automaton:
+                        automaton.add_word(keyword, (keyword, len(keyword)))
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _keyword_counts(self, normalized: str) -> Optional[Dict[str, int]]:
+        # Uma passada no texto; mesma contagem de str.count (ocorrencias sem sobreposicao).
+        if self._automaton is None:
+            return None
+        counts: Dict[str, int] = {}
+        next_start: Dict[str, int] = {}
+        for end, (keyword, length) in self._automaton.iter(normalized):  # type: ignore[attr-defined]
+            start = end - length + 1
+            if start < next_start.get(keyword, 0):
+                continue
+            next_start[keyword] = end + 1
+            counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
 
     def score_text(self, text: str) -> Dict[str, Dict[str, object]]:
         normalized = _normalize_text(text)
+        counts = self._keyword_counts(normalized)
         scores: Dict[str, Dict[str, object]] = {}
-        for category, profile in self.category_profiles.items():
-            score = 0.0
-            matches: List[str] = []
-            for keyword, weight in profile.get("keywords", {}).items():
-                if keyword in normalized:
-                    occurrences = normalized.count(keyword)
-                    score += weight * occurrences
-                    matches.extend([keyword] * occurrences)
-            negative_score = 0.0
-            for keyword, penalty in profile.get("negative_keywords", {}).items():
-                if keyword in normalized:
-                    occurrences = normalized.count(keyword)
-                    negative_score += penalty * occurrences
+        for category, (keywords, negative_keywords) in self._keyword_tables.items():
+            score, match_counts = _score_inner(normalized, keywords, counts)
+            negative_score = _score_inner(normalized, negative_keywords, counts)[0] if negative_keywords else 0.0
             score = max(0.0, score - negative_score)
             scores[category] = {
                 "score": round(score, 3),
-                "matches": matches[:20],
-                "occurrences": len(matches),
+                # Palavras-chave distintas (na ordem do perfil) e total de ocorrencias.
+                "matches": list(match_counts)[:20],
+                "occurrences": sum(match_counts.values()),
             }
         return scores
 
     def _resolve_alias(self, category: str) -> str:
-        normalized = _normalize_text(category)
-        if normalized in self.alias_map:
-            return self.alias_map[normalized]
-        return category
+        return self._normalized_alias_map.get(_normalize_label(category), category)
+
+    def _known_lookup(self, known_categories: List[str]) -> Dict[str, str]:
+        cached_source, cached_lookup = self._known_lookup_cache
+        if cached_source is known_categories:
+            return cached_lookup
+        lookup = {_normalize_label(cat): cat for cat in known_categories}
+        self._known_lookup_cache = (known_categories, lookup)
+        return lookup
 
     def _best_match_from_scores(self, scores: Dict[str, Dict[str, object]]) -> Tuple[str, Dict[str, object]]:
         best_category = "outros"
@@ -168,48 +256,48 @@ class TaxonomyRuleEngine:
 
         result = dict(validation_result)
         current_category = result.get("categoria") or "outros"
-        normalized_current = _normalize_text(current_category)
-        normalized_lookup = { _normalize_text(cat): cat for cat in scores }
-        current_profile_key = normalized_lookup.get(normalized_current)
+        normalized_current = _normalize_label(current_category)
+        current_profile_key = self._normalized_profile_keys.get(normalized_current)
         current_score = float(scores.get(current_profile_key, {}).get("score", 0.0)) if current_profile_key else 0.0
 
-        known_lookup = { _normalize_text(cat): cat for cat in known_categories }
+        known_lookup = self._known_lookup(known_categories)
         resolved_top = self._resolve_alias(top_category)
-        normalized_top = _normalize_text(resolved_top)
+        normalized_top = _normalize_label(resolved_top)
         top_in_known = normalized_top in known_lookup
         target_category = current_category
         action = "kept"
 
         matches_list = top_info.get("matches", [])
-        key_terms = ", ".join(sorted(set(matches_list))[:5])
-        best_kb_match = max((item.get("best_match", 0.0) for item in knowledge_matches), default=0.0)
+        key_terms = ", ".join(sorted(matches_list)[:5])
+        best_kb_match = max(map(_BEST_MATCH, knowledge_matches), default=0.0)
 
-        if top_score >= self.promote_threshold and normalized_top != normalized_current:
+        promote = self.promote_threshold
+        # Heuristica aponta com forca para outra categoria: promove ou registra como secundaria.
+        if top_score >= promote and normalized_top != normalized_current:
             if top_in_known:
                 target_category = known_lookup[normalized_top]
                 action = "promoted_existing"
             elif top_score >= self.new_category_threshold and top_info.get("occurrences", 0) >= 2:
                 target_category = resolved_top
                 action = "promoted_new_category"
-                result["nova_categoria_sugerida"] = resolved_top
-            elif top_score >= self.promote_threshold + 0.5:
+            elif top_score >= promote + 0.5:
                 target_category = resolved_top
                 action = "promoted_strong_alias"
-                result["nova_categoria_sugerida"] = resolved_top
-
-        if action.startswith("promoted"):
-            result["categoria"] = target_category
-            result.setdefault("justificativa", "")
-            if key_terms:
-                result["justificativa"] += (
-                    f"\nCamada heuristica consolidou categoria '{target_category}' "
-                    f"(palavras-chave: {key_terms})."
-                )
-        else:
-            if top_score >= self.promote_threshold and normalized_top != normalized_current:
-                result.setdefault("areas_secundarias", [])
-                if resolved_top not in result["areas_secundarias"]:
-                    result["areas_secundarias"].append(resolved_top)
+
+            if action != "kept":
+                if action != "promoted_existing":
+                    result["nova_categoria_sugerida"] = resolved_top
+                result["categoria"] = target_category
+                result.setdefault("justificativa", "")
+                if key_terms:
+                    result["justificativa"] += (
+                        f"\nCamada heuristica consolidou categoria '{target_category}' "
+                        f"(palavras-chave: {key_terms})."
+                    )
+            else:
+                areas = result.setdefault("areas_secundarias", [])
+                if resolved_top not in areas:
+                    areas.append(resolved_top)
                 if key_terms:
                     result.setdefault("justificativa", "")
                     result["justificativa"] += (
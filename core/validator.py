@@ -1,8 +1,11 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 from core.gpt_core import GPTCore
 
+# Ganho minimo de confianca entre tentativas para continuar reanalisando.
+MIN_CONFIDENCE_GAIN = 0.01
+
 
 class Validator:
     """Validates classification outputs and triggers reanalysis if confidence is low."""
@@ -25,17 +28,25 @@ class Validator:
                 self.threshold,
                 attempt,
             )
+            previous_confidence = current.get("confidence", 0)
             reanalysis = self.gpt_core.reanalyze_with_reinforcement(text, metadata, current)
             if not reanalysis:
                 break
             merged = dict(current)
             merged.update(reanalysis)
             current = self._normalize_entry(merged)
+            if current.get("confidence", 0) <= previous_confidence + MIN_CONFIDENCE_GAIN:
+                logging.info(
+                    "Reinforced analysis did not improve confidence (%.2f -> %.2f). Stopping retries.",
+                    previous_confidence,
+                    current.get("confidence", 0),
+                )
+                break
 
         if current.get("confidence", 0) < self.threshold:
             logging.warning(
                 "Confidence remains below threshold after %s attempts. Flagging as Não identificada.",
-                self.max_retries,
+                attempt,
             )
             current["categoria"] = "Não identificada"
             current.setdefault("nova_categoria_sugerida", "Categoria a ser definida pelo usuário")
@@ -50,23 +61,19 @@ class Validator:
 
     def _normalize_entry(self, data: Dict, force_min: float = 0.0) -> Dict:
         """Ensure confidence metrics stay consistent between 0-1 ratio and 0-100 percent."""
-        confidence_percent = data.get("confidence_percent")
-        confidence_field = data.get("confidence")
-        confianca = data.get("confianca")
-
-        values = [confidence_percent, confidence_field, confianca]
-        numeric_values = []
-        for value in values:
+        # Maior valor numerico entre os tres campos (mesma semantica de max()), sem listas temporarias.
+        best: Optional[float] = None
+        for value in (data.get("confidence_percent"), data.get("confidence"), data.get("confianca")):
             if value is None:
                 continue
             try:
-                numeric_values.append(float(value))
+                number = float(value)
             except (TypeError, ValueError):
                 continue
+            if best is None or number > best:
+                best = number
 
-        confidence_ratio = 0.0
-        if numeric_values:
-            best = max(numeric_values)
+        if best is not None:
             if best <= 1.0:
                 confidence_ratio = best
                 confidence_percent = best * 100.0
@@ -82,6 +89,5 @@ class Validator:
             confidence_percent = force_min * 100.0
 
         data["confidence"] = round(confidence_ratio, 4)
-        data["confidence_percent"] = round(confidence_percent, 2)
-        data["confianca"] = round(confidence_percent, 2)
+        data["confidence_percent"] = data["confianca"] = round(confidence_percent, 2)
         return data
@@ -1,6 +1,8 @@
+import atexit
 import json
 import logging
 import os
+import queue
 import shutil
 import threading
 import time
@@ -9,61 +11,174 @@ from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Set
 
+from core.fileio import write_all
 from core.knowledge_base import KnowledgeBase
+from core.optional_deps import orjson
 from core.processor import DocumentProcessor
 
+try:
+    from watchfiles import watch  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    watch = None  # type: ignore
+
+_ORJSON_OPTIONS = (orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _event_line(record: Dict) -> bytes:
+    """One JSONL line as UTF-8 bytes (orjson when installed, stdlib json otherwise)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(record, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Tipos que o orjson nao conhece (ex.: objetos customizados) seguem pelo json padrao.
+            pass
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
 
 class JsonEventLogger:
     """Utility to append structured events to a JSON lines log file."""
 
-    def __init__(self, log_path: Path):
+    def __init__(self, log_path: Path, max_bytes: int = 0, backup_count: int = 0):
         self.log_path = log_path
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.Lock()
+        # Rotacao como RotatingFileHandler: activity.jsonl -> .1 -> ... -> .N (0 desativa).
+        self.max_bytes = max(0, int(max_bytes))
+        self.backup_count = max(0, int(backup_count))
+        # Quem emite apenas enfileira; uma thread dedicada grava as linhas acumuladas de uma vez.
+        self._queue: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="JsonEventLogger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def emit(self, event_type: str, payload: Dict) -> None:
         record = {"type": event_type, "timestamp": time.time(), "payload": payload}
-        with self._lock:
-            with open(self.log_path, "a", encoding="utf-8") as handler:
-                handler.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Serializado ja na chamada: o payload pode ser alterado depois pelo emissor.
+        self._queue.put(_event_line(record))
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer thread."""
+        atexit.unregister(self.close)
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def _open_fd(self) -> int:
+        return os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _rotate(self, fd: int) -> int:
+        os.close(fd)
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.log_path.with_name(f"{self.log_path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.log_path.with_name(f"{self.log_path.name}.{index + 1}"))
+        if self.backup_count:
+            os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.1"))
+        else:
+            os.truncate(self.log_path, 0)
+        return self._open_fd()
+
+    def _write_loop(self) -> None:
+        fd = self._open_fd()
+        try:
+            running = True
+            while running:
+                lines = [self._queue.get()]
+                while True:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in lines:
+                    running = False
+                    lines = [line for line in lines if line is not None]
+                if lines:
+                    try:
+                        write_all(fd, b"".join(lines))
+                        if self.max_bytes and os.fstat(fd).st_size >= self.max_bytes:
+                            fd = self._rotate(fd)
+                    except OSError as exc:  # pragma: no cover - defensive logging
+                        logging.error("Falha ao gravar eventos em %s: %s", self.log_path, exc)
+        finally:
+            os.close(fd)
+
+
+# Arquivos ocultos/temporarios (ex.: ".nome.json.tmp") e locks do Office ("~$doc.docx").
+_IGNORED_PREFIXES = (".", "~$")
 
 
 class DirectoryWatcher(threading.Thread):
-    """Simple polling-based directory watcher."""
+    """Directory watcher driven by filesystem events (watchfiles) with a polling fallback."""
 
-    def __init__(self, name: str, directory: Path, interval: int, callback: Callable[[Path], None], logger: JsonEventLogger):
+    def __init__(
+        self,
+        name: str,
+        directory: Path,
+        interval: int,
+        callback: Callable[[Path], None],
+        logger: JsonEventLogger,
+        use_events: bool = False,
+    ):
         super().__init__(daemon=True, name=name)
         self.directory = directory
         self.interval = interval
         self.callback = callback
         self.logger = logger
+        self.use_events = use_events
         self._stop_event = threading.Event()
         self._seen: Set[str] = set()
 
     def run(self) -> None:
         logging.info("Watcher '%s' iniciado monitorando %s", self.name, self.directory)
+        if self.use_events and watch is not None:
+            try:
+                self._run_event_loop()
+                return
+            except Exception as exc:
+                logging.warning(
+                    "Watcher %s sem eventos do sistema de arquivos (%s); voltando ao polling.",
+                    self.name,
+                    exc,
+                )
         while not self._stop_event.is_set():
             self.poll_once()
-            time.sleep(self.interval)
+            self._stop_event.wait(self.interval)
+
+    def _run_event_loop(self) -> None:
+        # Cada lote de eventos dispara um scan; o timeout do intervalo mantem um scan
+        # periodico de seguranca (ex.: compartilhamentos de rede sem inotify).
+        self.poll_once()
+        for _changes in watch(
+            self.directory,
+            stop_event=self._stop_event,
+            rust_timeout=max(1, int(self.interval)) * 1000,
+            yield_on_timeout=True,
+            debounce=200,
+            recursive=False,
+        ):
+            self.poll_once()
 
     def poll_once(self) -> None:
         logging.debug("Watcher %s escaneando %s", self.name, self.directory)
         found_new = False
         try:
-            for file in self.directory.iterdir():
-                if not file.is_file():
-                    continue
-                if file.name.startswith("~$"):
-                    continue
-                if file.name not in self._seen:
-                    found_new = True
-                    self._seen.add(file.name)
-                    logging.info("Watcher %s detectou novo arquivo: %s", self.name, file.name)
-                    self.logger.emit(
-                        "detected",
-                        {"watcher": self.name, "file": file.name, "path": str(file)},
-                    )
-                    self._handle_file(file)
+            # scandir traz o tipo de cada entrada na propria listagem (d_type): sem stat por arquivo.
+            with os.scandir(self.directory) as entries:
+                new_entries = [
+                    (entry.name, entry.path)
+                    for entry in entries
+                    if entry.name not in self._seen
+                    and not entry.name.startswith(_IGNORED_PREFIXES)
+                    and entry.is_file()
+                ]
+            for name, entry_path in new_entries:
+                found_new = True
+                self._seen.add(name)
+                logging.info("Watcher %s detectou novo arquivo: %s", self.name, name)
+                self.logger.emit(
+                    "detected",
+                    {"watcher": self.name, "file": name, "path": entry_path},
+                )
+                self._handle_file(Path(entry_path))
         except Exception as exc:
             logging.error("Erro no watcher %s: %s", self.name, exc)
         if not found_new:
@@ -92,6 +207,7 @@ class IntakeWatcher:
         interval: int,
         logger: JsonEventLogger,
         max_workers: int = 2,
+        use_event_watch: bool = False,
     ):
         self.entrada_dir = entrada_dir
         self.processamento_dir = processamento_dir
@@ -104,12 +220,15 @@ class IntakeWatcher:
             thread_name_prefix="processor-worker",
         )
         self._active_tasks: Dict[str, Dict[str, float]] = {}
+        # Instante (monotonic) da ultima deteccao/enfileiramento/conclusao; usado para detectar ociosidade.
+        self.last_activity_ts = time.monotonic()
         self._thread = DirectoryWatcher(
             name="entrada-watcher",
             directory=self.entrada_dir,
             interval=self.interval,
             callback=self._on_new_file,
             logger=self.logger,
+            use_events=use_event_watch,
         )
 
     def start(self) -> None:
@@ -119,14 +238,21 @@ class IntakeWatcher:
         )
         self._thread.start()
 
+    def pending_count(self) -> int:
+        """Documents enqueued or being processed right now."""
+        return len(self._active_tasks)
+
     def stop(self) -> None:
         self._thread.stop()
         self._thread.join(timeout=5)
         logging.info("Aguardando conclusao das tarefas em andamento (%s).", len(self._active_tasks))
         self._executor.shutdown(wait=True)
+        # As finalizacoes encadeadas removem suas proprias tarefas; so depois o que sobrar e descartado.
+        self.processor.shutdown(wait=True)
         self._active_tasks.clear()
 
     def _on_new_file(self, file_path: Path) -> None:
+        self.last_activity_ts = time.monotonic()
         target = self.processamento_dir / file_path.name
         target.parent.mkdir(parents=True, exist_ok=True)
         try:
@@ -180,12 +306,19 @@ class IntakeWatcher:
                 )
             except Exception as exc:  # pragma: no cover - notificacoes
                 logging.debug("Falha ao enviar notificacao de recebimento: %s", exc)
-        future = self._executor.submit(self.processor.process_file, str(target), processing_id)
+        # Registrada antes do submit: uma tarefa rapida pode concluir antes da linha seguinte.
         self._active_tasks[processing_id] = {"started_at": enqueued_at, "file": target.name}
+        self.last_activity_ts = time.monotonic()
+        future = self._executor.submit(self.processor.process_file, str(target), processing_id)
         future.add_done_callback(lambda fut, pid=processing_id: self._on_processing_done(pid, fut))
 
     def _on_processing_done(self, processing_id: str, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None and isinstance(future.result(), Future):
+            # Pacote e notificacoes ainda em finalizacao: a tarefa so conclui quando o ZIP existir.
+            future.result().add_done_callback(lambda fut, pid=processing_id: self._on_processing_done(pid, fut))
+            return
         task_info = self._active_tasks.pop(processing_id, {"started_at": time.time(), "file": "desconhecido"})
+        self.last_activity_ts = time.monotonic()
         duration = time.time() - task_info.get("started_at", time.time())
         file_name = task_info.get("file", "desconhecido")
         if future.cancelled():
@@ -232,7 +365,8 @@ class IntakeWatcher:
 
     def _log_processing_folder_state(self, motivo: str) -> None:
         try:
-            arquivos = sorted(f.name for f in self.processamento_dir.iterdir() if f.is_file())
+            with os.scandir(self.processamento_dir) as entries:
+                arquivos = sorted(entry.name for entry in entries if entry.is_file())
         except FileNotFoundError:
             arquivos = []
         logging.info(
@@ -257,6 +391,7 @@ class FeedbackWatcher:
         knowledge_base: KnowledgeBase,
         interval: int,
         logger: JsonEventLogger,
+        use_event_watch: bool = False,
     ):
         self.feedback_dir = feedback_dir
         self.processed_dir = processed_feedback_dir
@@ -269,6 +404,7 @@ class FeedbackWatcher:
             interval=self.interval,
             callback=self._handle_feedback,
             logger=self.logger,
+            use_events=use_event_watch,
         )
 
     def start(self) -> None:
@@ -1,38 +1,49 @@
+import atexit
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
+import threading
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
-from core.gpt_core import GPTCore, GPTServiceUnavailable
-from core.knowledge_base import KnowledgeBase
-from core.processor import DocumentProcessor
-from core.validator import Validator
-from core.taxonomy import TaxonomyRuleEngine
-from core.watcher import FeedbackWatcher, IntakeWatcher, JsonEventLogger
-from core.notifier import TeamsNotifier
+from core.flags import parse_bool
+from core.optional_deps import orjson
+
+# Modulos do pipeline (openai, numpy, PyMuPDF...) sao importados em create_components:
+# carregar/inspecionar a configuracao nao paga esse custo de inicializacao.
 
 try:
-    from dotenv import load_dotenv  # type: ignore
+    from dotenv import dotenv_values  # type: ignore
 except ImportError:  # pragma: no cover - optional dependency
-    load_dotenv = None  # type: ignore
+    dotenv_values = None  # type: ignore
 
 BASE_DIR = Path(__file__).parent.resolve()
 CONFIG_PATH = BASE_DIR / "config.json"
+ENV_PATH = BASE_DIR / ".env"
 DEFAULT_CONFIG = {
     "api_key": "",
     "model": "gpt-5",
     "confidence_threshold": 0.8,
     "polling_interval": 10,
     "feedback_polling_interval": 10,
-    "processing_workers": 2,
+    "use_event_watch": True,
+    "processing_workers": 8,
+    "timeline_batch_events": True,
     "log_level": "DEBUG",
     "log_file": "logs/activity.jsonl",
     "text_log_file": "logs/system.log",
+    "log_max_bytes": 67108864,
+    "log_backup_count": 5,
     "knowledge_base_path": "knowledge.json",
+    "classification_cache_enabled": True,
+    "classification_cache_path": "classification_cache.sqlite3",
     "category_knowledge_root": "knowledge_sources",
     "max_retries": 3,
     "teams_activity_webhook_url": "",
@@ -47,6 +58,11 @@ DEFAULT_CONFIG = {
     "cross_validation_model": "gpt-5",
     "temperature": 1.0,
     "request_timeout": 60,
+    "llm_max_concurrency": 8,
+    "llm_rpm": 0,
+    "llm_tpm": 0,
+    "llm_batch_size": 1,
+    "llm_batch_window_ms": 100,
     "azure_keyvault_url": "",
     "use_azure": False,
     "azure_endpoint": "",
@@ -57,82 +73,140 @@ DEFAULT_CONFIG = {
 }
 
 
-def _env_value(key: str) -> Optional[str]:
-    value = os.getenv(key)
-    if value is None or value == "":
-        return None
-    return value
-
-
-def load_config() -> Dict:
-    if load_dotenv:
-        load_dotenv()
+# (chave de config, variaveis de ambiente em ordem de prioridade, conversor),
+# montado uma vez na importacao em vez de a cada load_config().
+_ENV_PLAN: Tuple[Tuple[str, Tuple[str, ...], Callable[[str], Any]], ...] = (
+    ("api_key", ("OPENAI_API_KEY",), str),
+    ("model", ("LLM_MODEL",), str),
+    ("cross_validation_model", ("LLM_CROSS_MODEL",), str),
+    ("confidence_threshold", ("CLASSIFIER_CONFIDENCE_THRESHOLD",), float),
+    ("polling_interval", ("CLASSIFIER_POLL_INTERVAL",), int),
+    ("feedback_polling_interval", ("CLASSIFIER_FEEDBACK_INTERVAL",), int),
+    ("processing_workers", ("CLASSIFIER_PROCESSING_WORKERS",), int),
+    ("log_level", ("CLASSIFIER_LOG_LEVEL",), str),
+    ("temperature", ("CLASSIFIER_TEMPERATURE",), float),
+    ("azure_keyvault_url", ("AZURE_KEYVAULT_URL",), str),
+    ("use_azure", ("USE_AZURE_OPENAI",), parse_bool),
+    ("azure_endpoint", ("AZURE_OPENAI_ENDPOINT", "URL_BASE"), str),
+    ("azure_api_key", ("AZURE_OPENAI_KEY", "API_KEY"), str),
+    ("azure_deployment", ("AZURE_OPENAI_DEPLOYMENT", "DEPLOYMENT_NAME"), str),
+    ("azure_api_version", ("AZURE_OPENAI_API_VERSION", "OPENAI_API_VERSION"), str),
+    ("teams_webhook_url", ("TEAMS_WEBHOOK_URL",), str),
+    ("teams_activity_webhook_url", ("TEAMS_ACTIVITY_WEBHOOK_URL",), str),
+    ("storage_root", ("CLASSIFIER_STORAGE_ROOT",), str),
+    ("input_subdir", ("CLASSIFIER_INPUT_SUBDIR",), str),
+    ("processing_subdir", ("CLASSIFIER_PROCESSING_SUBDIR",), str),
+    ("processing_fail_subdir", ("CLASSIFIER_PROCESSING_FAIL_SUBDIR",), str),
+    ("processed_subdir", ("CLASSIFIER_PROCESSED_SUBDIR",), str),
+    ("feedback_subdir", ("CLASSIFIER_FEEDBACK_SUBDIR",), str),
+    ("feedback_processed_subdir", ("CLASSIFIER_FEEDBACK_PROCESSED_SUBDIR",), str),
+    ("complex_samples_subdir", ("CLASSIFIER_COMPLEX_SAMPLES_SUBDIR",), str),
+    ("request_timeout", ("LLM_TIMEOUT_S",), float),
+    ("llm_rpm", ("LLM_RPM",), float),
+    ("llm_tpm", ("LLM_TPM",), float),
+)
+
+
+def _first_env(env: Mapping[str, str], aliases: Tuple[str, ...]) -> Optional[str]:
+    for alias in aliases:
+        value = env.get(alias)
+        if value:
+            return value
+    return None
+
+
+# .env ja aplicado ao processo, por (caminho, mtime_ns): so e relido quando muda.
+_DOTENV_CACHE: Dict[Tuple[str, int], Dict[str, str]] = {}
+# Variaveis que o proprio loader gravou em os.environ (e o valor gravado).
+_DOTENV_APPLIED: Dict[str, str] = {}
+
+
+def _apply_dotenv() -> None:
+    """Apply .env to os.environ; on change, keys this loader set are updated or removed."""
+    if dotenv_values is None:
+        return
+    try:
+        mtime_ns = ENV_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return
+    cache_key = (str(ENV_PATH), mtime_ns)
+    if cache_key in _DOTENV_CACHE:
+        return
+    values = {key: value for key, value in dotenv_values(ENV_PATH).items() if value is not None}
+    _DOTENV_CACHE.clear()
+    _DOTENV_CACHE[cache_key] = values
+    for key, applied in list(_DOTENV_APPLIED.items()):
+        # Chave removida do .env e nao alterada por fora desde entao: sai do ambiente.
+        if os.environ.get(key) == applied and key not in values:
+            del os.environ[key]
+            del _DOTENV_APPLIED[key]
+    for key, value in values.items():
+        # Igual ao load_dotenv(): variaveis definidas fora do .env tem prioridade.
+        current = os.environ.get(key)
+        if current is None or current == _DOTENV_APPLIED.get(key):
+            os.environ[key] = value
+            _DOTENV_APPLIED[key] = value
+
+
+def load_config() -> Mapping[str, Any]:
+    """Merged configuration (defaults < config.json < environment) as a read-only mapping."""
+    _apply_dotenv()
     if not CONFIG_PATH.exists():
-        with open(CONFIG_PATH, "w", encoding="utf-8") as handler:
-            json.dump(DEFAULT_CONFIG, handler, indent=2, ensure_ascii=False)
-        return dict(DEFAULT_CONFIG)
-    with open(CONFIG_PATH, "r", encoding="utf-8") as handler:
-        data = json.load(handler)
+        if orjson is not None:
+            CONFIG_PATH.write_bytes(orjson.dumps(DEFAULT_CONFIG, option=orjson.OPT_INDENT_2))
+        else:
+            CONFIG_PATH.write_text(json.dumps(DEFAULT_CONFIG, indent=2, ensure_ascii=False), encoding="utf-8")
+        return MappingProxyType(dict(DEFAULT_CONFIG))
+    stat = CONFIG_PATH.stat()
+    # Uma copia do ambiente: lookups em dict puro, sem reencode a cada os.getenv.
+    env = dict(os.environ)
+    env_values = tuple(_first_env(env, aliases) for _, aliases, _ in _ENV_PLAN)
+    # Somente leitura: todas as chamadas compartilham o mesmo objeto em cache, sem copia.
+    return _load_config_cached(stat.st_mtime_ns, stat.st_size, env_values)
+
+
+@lru_cache(maxsize=4)
+def _load_config_cached(mtime_ns: int, size: int, env_values: Tuple[Optional[str], ...]) -> Mapping[str, Any]:
+    """Parse config.json and apply env overrides; keyed by file version and env values."""
+    if orjson is not None:
+        data = orjson.loads(CONFIG_PATH.read_bytes())
+    else:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as handler:
+            data = json.load(handler)
     # merge defaults to guarantee required keys
     merged = dict(DEFAULT_CONFIG)
     merged.update(data)
 
-    env_overrides = {
-        "api_key": _env_value("OPENAI_API_KEY"),
-        "model": _env_value("LLM_MODEL"),
-        "cross_validation_model": _env_value("LLM_CROSS_MODEL"),
-        "confidence_threshold": _env_value("CLASSIFIER_CONFIDENCE_THRESHOLD"),
-        "polling_interval": _env_value("CLASSIFIER_POLL_INTERVAL"),
-        "feedback_polling_interval": _env_value("CLASSIFIER_FEEDBACK_INTERVAL"),
-        "processing_workers": _env_value("CLASSIFIER_PROCESSING_WORKERS"),
-        "log_level": _env_value("CLASSIFIER_LOG_LEVEL"),
-        "temperature": _env_value("CLASSIFIER_TEMPERATURE"),
-        "azure_keyvault_url": _env_value("AZURE_KEYVAULT_URL"),
-        "use_azure": _env_value("USE_AZURE_OPENAI"),
-        "azure_endpoint": _env_value("AZURE_OPENAI_ENDPOINT") or _env_value("URL_BASE"),
-        "azure_api_key": _env_value("AZURE_OPENAI_KEY") or _env_value("API_KEY"),
-        "azure_deployment": _env_value("AZURE_OPENAI_DEPLOYMENT") or _env_value("DEPLOYMENT_NAME"),
-        "azure_api_version": _env_value("AZURE_OPENAI_API_VERSION") or _env_value("OPENAI_API_VERSION"),
-        "teams_webhook_url": _env_value("TEAMS_WEBHOOK_URL"),
-        "teams_activity_webhook_url": _env_value("TEAMS_ACTIVITY_WEBHOOK_URL"),
-        "storage_root": _env_value("CLASSIFIER_STORAGE_ROOT"),
-        "input_subdir": _env_value("CLASSIFIER_INPUT_SUBDIR"),
-        "processing_subdir": _env_value("CLASSIFIER_PROCESSING_SUBDIR"),
-        "processing_fail_subdir": _env_value("CLASSIFIER_PROCESSING_FAIL_SUBDIR"),
-        "processed_subdir": _env_value("CLASSIFIER_PROCESSED_SUBDIR"),
-        "feedback_subdir": _env_value("CLASSIFIER_FEEDBACK_SUBDIR"),
-        "feedback_processed_subdir": _env_value("CLASSIFIER_FEEDBACK_PROCESSED_SUBDIR"),
-        "complex_samples_subdir": _env_value("CLASSIFIER_COMPLEX_SAMPLES_SUBDIR"),
-    }
-
-    for key, value in env_overrides.items():
+    for (key, _aliases, parser), value in zip(_ENV_PLAN, env_values):
         if not value:
             continue
-        if key in {"polling_interval", "feedback_polling_interval", "processing_workers"}:
-            try:
-                merged[key] = int(value)
-            except ValueError:
-                logging.warning("Could not convert env override %s=%s to int. Keeping config value.", key, value)
-        elif key in {"confidence_threshold", "temperature"}:
-            try:
-                merged[key] = float(value)
-            except ValueError:
-                logging.warning("Could not convert env override %s=%s to float. Keeping config value.", key, value)
-        elif key == "use_azure":
-            merged[key] = str(value).strip().lower() in {"1", "true", "yes", "on"}
-        else:
-            merged[key] = value
-
-    timeout_value = _env_value("LLM_TIMEOUT_S")
-    if timeout_value:
         try:
-            merged["request_timeout"] = float(timeout_value)
+            merged[key] = parser(value)
         except ValueError:
-            logging.warning("Could not convert LLM_TIMEOUT_S=%s to float.", timeout_value)
+            logging.warning(
+                "Could not convert env override %s=%s to %s. Keeping config value.",
+                key,
+                value,
+                parser.__name__,
+            )
 
-    return merged
+    return MappingProxyType(merged)
 
 
+# Segredos nunca vao para o log (webhooks do Teams carregam o token na URL).
+_REDACTED_CONFIG_KEYS = frozenset(
+    {"api_key", "azure_api_key", "teams_webhook_url", "teams_activity_webhook_url"}
+)
+
+
+def _config_for_logging(config: Mapping[str, Any]) -> Dict:
+    return {
+        key: ("***" if key in _REDACTED_CONFIG_KEYS and value else value)
+        for key, value in config.items()
+    }
+
+
+@lru_cache(maxsize=64)
 def _resolve_path(value: str) -> Path:
     candidate = Path(value)
     if candidate.is_absolute():
@@ -140,61 +214,126 @@ def _resolve_path(value: str) -> Path:
     return BASE_DIR / candidate
 
 
-def setup_logging(config: Dict) -> None:
+_LOG_LISTENER: Optional[logging.handlers.QueueListener] = None
+_LOG_BUFFER_SIZE = 1 << 16
+_LOG_FLUSH_INTERVAL = 1.0
+
+
+class _BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that keeps a 64 KiB write buffer instead of flushing every record."""
+
+    _last_flush = 0.0
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, encoding=self.encoding, errors=self.errors, buffering=_LOG_BUFFER_SIZE)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            # Avisos/erros vao para o disco na hora; sob carga continua o restante sai ao menos a cada
+            # segundo, e o listener descarrega o buffer sempre que a fila esvazia.
+            now = time.monotonic()
+            if record.levelno >= logging.WARNING or now - self._last_flush >= _LOG_FLUSH_INTERVAL:
+                self.stream.flush()
+                self._last_flush = now
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue runs dry."""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+        # Fila vazia: o que estiver no buffer vai para o disco antes de aguardar o proximo registro,
+        # assim nada fica retido quando o servico fica ocioso.
+        for handler in self.handlers:
+            handler.flush()
+        return self.queue.get(block=True)
+
+
+def setup_logging(config: Mapping[str, Any]) -> None:
+    global _LOG_LISTENER
     log_level = getattr(logging, config.get("log_level", "INFO").upper(), logging.INFO)
     text_log_path = _resolve_path(config.get("text_log_file", "logs/system.log"))
     text_log_path.parent.mkdir(parents=True, exist_ok=True)
 
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
     handlers = [logging.StreamHandler(sys.stdout)]
-    file_handler = logging.FileHandler(text_log_path, encoding="utf-8")
-    handlers.append(file_handler)
-
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=handlers,
-        force=True,
+    file_handler = _BufferedRotatingFileHandler(
+        text_log_path,
+        maxBytes=int(config.get("log_max_bytes", 64 << 20) or 0),
+        backupCount=int(config.get("log_backup_count", 5) or 0),
+        encoding="utf-8",
+        delay=True,
     )
+    handlers.append(file_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # As threads de processamento apenas enfileiram; o listener escreve no console e no arquivo.
+    _stop_log_listener()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(log_level)
+    _LOG_LISTENER = _FlushingQueueListener(log_queue, *handlers)
+    _LOG_LISTENER.start()
     logging.info("Logging configurado. Saida principal em %s", text_log_path)
 
 
-def resolve_storage_paths(config: Dict) -> Dict[str, Path]:
-    storage_root = _resolve_path(config.get("storage_root", "folders"))
+def _stop_log_listener() -> None:
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        for handler in _LOG_LISTENER.handlers:
+            handler.close()
+        _LOG_LISTENER = None
 
-    def _resolve_relative(value: Optional[str], default: str) -> Path:
-        raw = value if value not in {None, ""} else default
-        candidate = Path(raw)
-        if candidate.is_absolute():
-            return candidate
-        return storage_root / candidate
 
-    input_dir = _resolve_relative(config.get("input_subdir"), "entrada")
-    processing_dir = _resolve_relative(config.get("processing_subdir"), "em_processamento")
+atexit.register(_stop_log_listener)
 
-    processing_fail_raw = config.get("processing_fail_subdir", "_falhas")
-    processing_fail_dir = Path(processing_fail_raw)
-    if not processing_fail_dir.is_absolute():
-        processing_fail_dir = processing_dir / processing_fail_raw
 
-    processed_dir = _resolve_relative(config.get("processed_subdir"), "processados")
-    feedback_dir = _resolve_relative(config.get("feedback_subdir"), "feedback")
-    feedback_processed_raw = config.get("feedback_processed_subdir", "processado")
-    feedback_processed_dir = Path(feedback_processed_raw)
-    if not feedback_processed_dir.is_absolute():
-        feedback_processed_dir = feedback_dir / feedback_processed_raw
+# (chave do caminho, chave de config, valor padrao, pasta pai); pais aparecem antes dos filhos.
+_STORAGE_LAYOUT: Tuple[Tuple[str, str, str, str], ...] = (
+    ("input_dir", "input_subdir", "entrada", "storage_root"),
+    ("processing_dir", "processing_subdir", "em_processamento", "storage_root"),
+    ("processing_fail_dir", "processing_fail_subdir", "_falhas", "processing_dir"),
+    ("processed_dir", "processed_subdir", "processados", "storage_root"),
+    ("feedback_dir", "feedback_subdir", "feedback", "storage_root"),
+    ("feedback_processed_dir", "feedback_processed_subdir", "processado", "feedback_dir"),
+    ("complex_samples_dir", "complex_samples_subdir", "complex_samples", "storage_root"),
+)
 
-    complex_samples_dir = _resolve_relative(config.get("complex_samples_subdir"), "complex_samples")
 
-    return {
-        "storage_root": storage_root,
-        "input_dir": input_dir,
-        "processing_dir": processing_dir,
-        "processing_fail_dir": processing_fail_dir,
-        "processed_dir": processed_dir,
-        "feedback_dir": feedback_dir,
-        "feedback_processed_dir": feedback_processed_dir,
-        "complex_samples_dir": complex_samples_dir,
-    }
+def resolve_storage_paths(config: Mapping[str, Any]) -> Dict[str, Path]:
+    key = (config.get("storage_root", "folders"),) + tuple(
+        config.get(config_key) or default for _, config_key, default, _ in _STORAGE_LAYOUT
+    )
+    return dict(_resolve_storage_paths_cached(key))
+
+
+@lru_cache(maxsize=8)
+def _resolve_storage_paths_cached(key: Tuple[str, ...]) -> Dict[str, Path]:
+    # Chave: raiz + valores das subpastas na ordem de _STORAGE_LAYOUT.
+    paths: Dict[str, Path] = {"storage_root": _resolve_path(key[0])}
+    for (name, _, _, parent), value in zip(_STORAGE_LAYOUT, key[1:]):
+        candidate = Path(value)
+        paths[name] = candidate if candidate.is_absolute() else paths[parent] / candidate
+    return paths
 
 
 def ensure_structure(paths: Dict[str, Path]) -> None:
@@ -213,14 +352,59 @@ def ensure_structure(paths: Dict[str, Path]) -> None:
     for category in default_categories:
         base_directories.append(paths["processed_dir"] / category)
     for directory in base_directories:
-        if directory.exists():
+        # Um unico mkdir por pasta; EEXIST substitui a consulta exists() previa.
+        try:
+            directory.mkdir(parents=True)
+        except FileExistsError:
             logging.debug("Pasta ja existia: %s", directory)
         else:
-            directory.mkdir(parents=True, exist_ok=True)
             logging.info("Pasta criada: %s", directory)
 
 
-def create_components(config: Dict):
+def _build_http_client(max_connections: Optional[int] = None, **kwargs: Any) -> Any:
+    """Long-lived httpx client (HTTP/2 when the h2 extra is installed), closed at exit."""
+    try:
+        import httpx  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency (instalado junto com openai)
+        return None
+    if max_connections:
+        kwargs["limits"] = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    try:
+        client = httpx.Client(http2=True, **kwargs)
+    except ImportError:
+        client = httpx.Client(**kwargs)
+    _COMPONENT_CLOSERS.append(client.close)
+    return client
+
+
+# Recursos abertos por create_components (threads, conexoes, arquivos), fechados em ordem inversa.
+_COMPONENT_CLOSERS: list = []
+
+
+def close_components() -> None:
+    """Release what create_components opened; safe to call more than once."""
+    while _COMPONENT_CLOSERS:
+        closer = _COMPONENT_CLOSERS.pop()
+        try:
+            closer()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logging.error("Falha ao liberar recurso %s: %s", closer, exc)
+
+
+atexit.register(close_components)
+
+
+def create_components(config: Mapping[str, Any]):
+    from core.classification_cache import ClassificationCache
+    from core.gpt_core import GPTCore
+    from core.knowledge_base import KnowledgeBase
+    from core.notifier import TeamsNotifier
+    from core.processor import DocumentProcessor
+    from core.ratelimit import TokenBucket
+    from core.taxonomy import TaxonomyRuleEngine
+    from core.validator import Validator
+    from core.watcher import FeedbackWatcher, IntakeWatcher, JsonEventLogger
+
     storage_paths = resolve_storage_paths(config)
     ensure_structure(storage_paths)
     knowledge_path = _resolve_path(config.get("knowledge_base_path", "knowledge.json"))
@@ -230,17 +414,32 @@ def create_components(config: Dict):
         category_root_path = (BASE_DIR / category_root_path).resolve()
     category_root_path.mkdir(parents=True, exist_ok=True)
     log_file = _resolve_path(config.get("log_file", "logs/activity.jsonl"))
-    event_logger = JsonEventLogger(log_file)
+    event_logger = JsonEventLogger(
+        log_file,
+        max_bytes=int(config.get("log_max_bytes", 64 << 20) or 0),
+        backup_count=int(config.get("log_backup_count", 5) or 0),
+    )
+    _COMPONENT_CLOSERS.append(event_logger.close)
     knowledge_base = KnowledgeBase(str(knowledge_path), str(category_root_path))
 
-    gpt_core = GPTCore(config, knowledge_base)
+    rate_limiter = TokenBucket(rpm=config.get("llm_rpm", 0), tpm=config.get("llm_tpm", 0))
+    llm_http = _build_http_client(max_connections=64, timeout=float(config.get("request_timeout") or 60))
+    gpt_core = GPTCore(config, knowledge_base, rate_limiter=rate_limiter, http_client=llm_http)
+    _COMPONENT_CLOSERS.append(gpt_core.close)
     gpt_core.ensure_available()
     validator = Validator(config, gpt_core)
     taxonomy_engine = TaxonomyRuleEngine()
     teams_notifier = TeamsNotifier(
         config.get("teams_webhook_url", ""),
         config.get("teams_activity_webhook_url", ""),
+        http_client=_build_http_client(timeout=10.0),
     )
+    classification_cache = None
+    if bool(config.get("classification_cache_enabled", True)):
+        classification_cache = ClassificationCache(
+            str(_resolve_path(config.get("classification_cache_path", "classification_cache.sqlite3")))
+        )
+        _COMPONENT_CLOSERS.append(classification_cache.close)
     processor = DocumentProcessor(
         gpt_core=gpt_core,
         validator=validator,
@@ -250,6 +449,8 @@ def create_components(config: Dict):
         taxonomy_engine=taxonomy_engine,
         teams_notifier=teams_notifier,
         storage_paths=storage_paths,
+        batch_timeline_events=bool(config.get("timeline_batch_events", True)),
+        classification_cache=classification_cache,
     )
 
     intake_watcher = IntakeWatcher(
@@ -258,7 +459,8 @@ def create_components(config: Dict):
         processor=processor,
         interval=int(config.get("polling_interval", 10)),
         logger=event_logger,
-        max_workers=int(config.get("processing_workers", 2)),
+        max_workers=int(config.get("processing_workers", 8)),
+        use_event_watch=bool(config.get("use_event_watch", True)),
     )
     feedback_watcher = FeedbackWatcher(
         feedback_dir=storage_paths["feedback_dir"],
@@ -266,15 +468,18 @@ def create_components(config: Dict):
         knowledge_base=knowledge_base,
         interval=int(config.get("feedback_polling_interval", 15)),
         logger=event_logger,
+        use_event_watch=bool(config.get("use_event_watch", True)),
     )
 
     return intake_watcher, feedback_watcher
 
 
 def main() -> None:
+    from core.gpt_core import GPTServiceUnavailable
+
     config = load_config()
     setup_logging(config)
-    logging.info("Configuracao carregada: %s", {k: v for k, v in config.items() if k != "api_key"})
+    logging.info("Configuracao carregada: %s", _config_for_logging(config))
 
     try:
         intake_watcher, feedback_watcher = create_components(config)
@@ -284,11 +489,10 @@ def main() -> None:
     intake_watcher.start()
     feedback_watcher.start()
 
+    stop_event = threading.Event()
+
     def shutdown_handler(*_args):
-        logging.info("Encerrando watchers...")
-        intake_watcher.stop()
-        feedback_watcher.stop()
-        sys.exit(0)
+        stop_event.set()
 
     signal.signal(signal.SIGINT, shutdown_handler)
     signal.signal(signal.SIGTERM, shutdown_handler)
@@ -296,11 +500,20 @@ def main() -> None:
     logging.info("GPT Document Classifier pronto. Monitore a pasta 'folders/entrada/'.")
 
     try:
-        while True:
-            time.sleep(1)
+        if sys.platform == "win32":
+            # No Windows um Event.wait() sem prazo nao e interrompido por Ctrl+C (bpo-29971).
+            while not stop_event.wait(0.5):
+                pass
+        else:
+            # POSIX: o handler de sinal roda durante a espera e a libera; nenhum despertar periodico.
+            stop_event.wait()
     except KeyboardInterrupt:
-        shutdown_handler()
-
+        pass
+    logging.info("Encerrando watchers...")
+    intake_watcher.stop()
+    feedback_watcher.stop()
+    close_components()
+    sys.exit(0)
 
 if __name__ == "__main__":
     main()
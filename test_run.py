@@ -1,24 +1,43 @@
 import os
 import time
 
-from main import create_components, load_config, setup_logging
+from main import close_components, create_components, load_config, setup_logging
 
 
-def main(duration: int = 30) -> None:
-    """Execute the classifier pipeline for a limited duration (testing helper)."""
+def main(max_duration: float = 30, quiet_period: float = 2) -> None:
+    """Run the classifier pipeline until it drains (testing helper).
+
+    Stops once no document is pending and nothing happened for ``quiet_period``
+    seconds, or after ``max_duration`` seconds at most.
+    """
     config = load_config()
     setup_logging(config)
-    intake_watcher, feedback_watcher = create_components(config)
+    try:
+        intake_watcher, feedback_watcher = create_components(config)
+    except BaseException:
+        close_components()
+        raise
 
     intake_watcher.start()
     feedback_watcher.start()
+    start = time.monotonic()
     try:
-        time.sleep(duration)
+        while time.monotonic() - start < max_duration:
+            idle_for = time.monotonic() - intake_watcher.last_activity_ts
+            if intake_watcher.pending_count() == 0 and idle_for > quiet_period:
+                break
+            time.sleep(0.1)
     finally:
         intake_watcher.stop()
         feedback_watcher.stop()
+        # Libera threads, conexoes e arquivos: o test_run pode rodar varias vezes no mesmo processo.
+        close_components()
 
 
 if __name__ == "__main__":
-    runtime = int(os.environ.get("CLASSIFIER_TEST_DURATION", "30"))
-    main(runtime)
+    # CLASSIFIER_TEST_DURATION continua aceito como teto de duracao.
+    max_runtime = float(
+        os.environ.get("CLASSIFIER_TEST_MAX_DURATION") or os.environ.get("CLASSIFIER_TEST_DURATION") or "30"
+    )
+    quiet = float(os.environ.get("CLASSIFIER_TEST_QUIET_PERIOD", "2"))
+    main(max_runtime, quiet)
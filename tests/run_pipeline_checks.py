@@ -1,28 +1,59 @@
+import argparse
+import compileall
+import hashlib
 import json
 import os
 import shutil
+import struct
 import subprocess
 import sys
+import tarfile
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 PYTHON_EXE = sys.executable
 TIMEOUT = 60
+# Snapshot do workspace pronto (amostras + __pycache__); reaproveitado enquanto o codigo nao mudar.
+FIXTURE_TAR = BASE_DIR / "tests" / ".fixture.tar"
+FIXTURE_SOURCES = ("core", "main.py", "tools")
+COMPILE_CACHE = BASE_DIR / "tests" / ".compile_cache"
+FIXTURE_TREES = (
+    "samples",
+    "folders/entrada",
+    "folders/em_processamento",
+    "__pycache__",
+    "core/__pycache__",
+    "tools/__pycache__",
+)
+
+# Etapas rodam no proprio interpretador (sem um novo processo Python por etapa);
+# --subprocess restaura a execucao isolada.
+for _path in (str(BASE_DIR), str(Path(__file__).resolve().parent)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+def _run_to_tempfile(cmd, cwd=BASE_DIR, env=None, timeout=TIMEOUT):
+    """Run ``cmd`` with stdout+stderr spooled to a temp file; return (returncode, output-or-None)."""
+    # A saida so e lida em caso de falha: nada de pipe cheio bloqueando o filho
+    # nem decodificacao de megabytes de log no caminho feliz.
+    with tempfile.TemporaryFile() as output:
+        result = subprocess.run(cmd, cwd=cwd, env=env, stdout=output, stderr=subprocess.STDOUT, timeout=timeout)
+        if result.returncode == 0:
+            return result.returncode, None
+        output.seek(0)
+        return result.returncode, output.read().decode("utf-8", errors="replace")
 
 
 def run_step(cmd, cwd=BASE_DIR, check=True):
-    result = subprocess.run(
-        cmd,
-        cwd=cwd,
-        capture_output=True,
-        text=True,
-        timeout=TIMEOUT,
-    )
-    if check and result.returncode != 0:
-        raise RuntimeError(f"Comando falhou: {' '.join(cmd)}\n{result.stdout}\n{result.stderr}")
-    return result
+    returncode, output = _run_to_tempfile(cmd, cwd=cwd)
+    if check and returncode != 0:
+        raise RuntimeError(f"Comando falhou: {' '.join(cmd)}\n{output}")
+    return returncode
 
 
 def clean_workspace():
@@ -30,57 +61,261 @@ def clean_workspace():
     processamento = BASE_DIR / "folders" / "em_processamento"
     for folder in (entrada, processamento):
         folder.mkdir(parents=True, exist_ok=True)
-        for item in folder.iterdir():
-            if item.is_file():
-                item.unlink(missing_ok=True)
+        # scandir ja traz o tipo da entrada: sem um stat por arquivo antes do unlink.
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
     falhas = processamento / "_falhas"
-    if falhas.exists():
-        shutil.rmtree(falhas)
-        falhas.mkdir(parents=True, exist_ok=True)
+    shutil.rmtree(falhas, ignore_errors=True)
+    falhas.mkdir(parents=True, exist_ok=True)
+
+
+def _iter_sources():
+    """Yield ``(relative path, stat)`` for every .py under FIXTURE_SOURCES, in a stable order."""
+    for name in FIXTURE_SOURCES:
+        source = BASE_DIR / name
+        if source.is_file():
+            yield name, source.stat()
+            continue
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.endswith(".py"):
+                    path = os.path.join(root, file_name)
+                    yield os.path.relpath(path, BASE_DIR), os.stat(path)
+
+
+def _source_signature() -> str:
+    # BLAKE2b sobre o interpretador e nome, mtime e tamanho de cada fonte: chave de cache, sem uso criptografico.
+    digest = hashlib.blake2b(digest_size=16)
+    # Sintaxe valida em um interpretador pode nao compilar em outro (ex.: 3.12 -> 3.11).
+    digest.update(f"{sys.implementation.cache_tag}|{sys.version}".encode("utf-8"))
+    for rel_path, stat in _iter_sources():
+        digest.update(rel_path.encode("utf-8"))
+        digest.update(struct.pack("<qQ", stat.st_mtime_ns, stat.st_size))
+    return digest.hexdigest()
+
+
+def _compile_is_cached(signature: str) -> bool:
+    try:
+        return COMPILE_CACHE.read_text(encoding="utf-8").strip() == signature
+    except FileNotFoundError:
+        return False
+
 
+def run_compile_check(in_process: bool = True):
+    signature = _source_signature()
+    if _compile_is_cached(signature):
+        return
+    if not in_process:
+        run_step([PYTHON_EXE, "-m", "compileall", "core", "main.py", "tools"], check=True)
+    else:
+        ok = all(
+            [
+                compileall.compile_dir(str(BASE_DIR / "core"), quiet=1),
+                compileall.compile_file(str(BASE_DIR / "main.py"), quiet=1),
+                compileall.compile_dir(str(BASE_DIR / "tools"), quiet=1),
+            ]
+        )
+        if not ok:
+            raise RuntimeError("compileall encontrou erros de sintaxe.")
+    COMPILE_CACHE.write_text(signature + "\n", encoding="utf-8")
 
-def run_compile_check():
-    run_step([PYTHON_EXE, "-m", "compileall", "core", "main.py", "tools"], check=True)
 
+def prepare_samples(in_process: bool = True):
+    if not in_process:
+        run_step([PYTHON_EXE, "tools/create_sample_documents.py", "--overwrite", "--drop-into-entrada"], check=True)
+        return
+    from tools.create_sample_documents import create_samples
 
-def prepare_samples():
-    run_step([PYTHON_EXE, "tools/create_sample_documents.py", "--overwrite", "--drop-into-entrada"], check=True)
+    create_samples(BASE_DIR, overwrite=True, drop_into_entrada=True)
 
 
-def run_pipeline(duration: int = 20):
+def run_pipeline(duration: int = 20, in_process: bool = True, use_worker: bool = False):
+    max_duration = float(
+        os.environ.get("CLASSIFIER_TEST_MAX_DURATION") or os.environ.get("CLASSIFIER_TEST_DURATION") or duration
+    )
+    quiet_period = float(os.environ.get("CLASSIFIER_TEST_QUIET_PERIOD", "2"))
+    if use_worker:
+        from worker import request_run
+
+        reply = request_run(max_duration, quiet_period, timeout=max(TIMEOUT, max_duration + 10))
+        if reply is not None:
+            if reply.get("returncode") != 0:
+                raise RuntimeError(f"test_run falhou no worker\n{reply.get('stderr', '')}")
+            return
+        print("Worker de testes indisponivel; executando test_run neste processo.")
+    if in_process:
+        import test_run
+
+        test_run.main(max_duration, quiet_period)
+        return
     env = dict(**os.environ)
     env.setdefault("CLASSIFIER_TEST_DURATION", str(duration))
-    result = subprocess.run(
+    returncode, output = _run_to_tempfile(
         [PYTHON_EXE, "test_run.py"],
-        cwd=BASE_DIR,
         env=env,
-        capture_output=True,
-        text=True,
         timeout=max(TIMEOUT, duration + 10),
     )
-    if result.returncode != 0:
-        raise RuntimeError(f"test_run.py falhou\n{result.stdout}\n{result.stderr}")
+    if returncode != 0:
+        raise RuntimeError(f"test_run.py falhou\n{output}")
+
+
+def _has_zip(root) -> bool:
+    """Depth-first scandir walk that stops at the first ``.zip`` found."""
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".zip"):
+                    return True
+    return False
 
 
 def validate_outputs():
     processed_dir = BASE_DIR / "folders" / "processados"
     if not processed_dir.exists():
         raise RuntimeError("Pasta folders/processados nao encontrada apos execucao.")
-    zip_files = list(processed_dir.rglob("*.zip"))
-    if not zip_files:
+    if not _has_zip(processed_dir):
         raise RuntimeError("Nenhum pacote ZIP foi gerado durante o teste automatizado.")
 
 
-def main():
+# Compilacao e amostras num unico interpretador filho: paga a inicializacao do Python uma vez.
+# As sentinelas separam a saida de cada etapa quando o driver falha.
+_SETUP_DRIVER = """
+import compileall, sys
+from pathlib import Path
+if "--skip-compile" not in sys.argv:
+    print("--- STAGE:compileall ---", flush=True)
+    ok = all([
+        compileall.compile_dir("core", quiet=1),
+        compileall.compile_file("main.py", quiet=1),
+        compileall.compile_dir("tools", quiet=1),
+    ])
+    if not ok:
+        sys.exit("compileall encontrou erros de sintaxe.")
+print("--- STAGE:create_samples ---", flush=True)
+from tools.create_sample_documents import create_samples
+create_samples(Path.cwd(), overwrite=True, drop_into_entrada=True)
+"""
+
+
+def run_setup_subprocess():
     clean_workspace()
-    run_compile_check()
-    prepare_samples()
-    run_pipeline(duration=25)
+    signature = _source_signature()
+    compile_cached = _compile_is_cached(signature)
+    cmd = [PYTHON_EXE, "-c", _SETUP_DRIVER] + (["--skip-compile"] if compile_cached else [])
+    returncode, output = _run_to_tempfile(cmd)
+    if returncode != 0:
+        raise RuntimeError(f"Preparo (compileall + amostras) falhou\n{output}")
+    if not compile_cached:
+        COMPILE_CACHE.write_text(signature + "\n", encoding="utf-8")
+
+
+def _clean_and_prepare(in_process: bool = True):
+    clean_workspace()
+    prepare_samples(in_process)
+
+
+def _latest_source_mtime() -> float:
+    return max((stat.st_mtime for _rel_path, stat in _iter_sources()), default=0.0)
+
+
+def _fixture_is_fresh() -> bool:
+    try:
+        fixture_mtime = FIXTURE_TAR.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    if fixture_mtime > _latest_source_mtime():
+        return True
+    FIXTURE_TAR.unlink(missing_ok=True)
+    return False
+
+
+def _save_fixture():
+    tmp_path = FIXTURE_TAR.with_name(FIXTURE_TAR.name + ".tmp")
+    with tarfile.open(tmp_path, "w") as tar:
+        for rel in FIXTURE_TREES:
+            if (BASE_DIR / rel).exists():
+                tar.add(BASE_DIR / rel, arcname=rel)
+    os.replace(tmp_path, FIXTURE_TAR)
+
+
+def _inside_base(name: str) -> bool:
+    path = Path(name)
+    return not path.is_absolute() and ".." not in path.parts
+
+
+def _safe_members(tar: tarfile.TarFile):
+    """Files, directories and in-archive hardlinks that stay inside BASE_DIR (pre-3.11.4 stand-in for filter="data")."""
+    for member in tar.getmembers():
+        # As amostras em folders/entrada sao hardlinks das de samples/ (LNKTYPE no tar).
+        allowed = member.isfile() or member.isdir() or (member.islnk() and _inside_base(member.linkname))
+        if not allowed or not _inside_base(member.name):
+            raise tarfile.TarError(f"Membro inesperado no fixture: {member.name}")
+        yield member
+
+
+def _restore_fixture() -> bool:
+    """Restore the workspace snapshot; False (and the snapshot discarded) when it cannot be extracted."""
+    clean_workspace()
+    try:
+        with tarfile.open(FIXTURE_TAR) as tar:
+            # filter= existe a partir do Python 3.11.4 (e backports); antes disso valida os membros aqui.
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(BASE_DIR, filter="data")
+            else:
+                tar.extractall(BASE_DIR, members=_safe_members(tar))
+    except tarfile.TarError as exc:
+        print(f"Fixture invalido ({exc}); preparando o workspace do zero.")
+        FIXTURE_TAR.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida o pipeline de ponta a ponta.")
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Executa cada etapa em um processo Python separado (isolamento total).",
+    )
+    parser.add_argument(
+        "--rebuild-fixture",
+        action="store_true",
+        help="Ignora o snapshot tests/.fixture.tar e refaz compilacao e amostras.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Delega o test_run ao worker persistente (python tests/worker.py), se estiver ativo.",
+    )
+    args = parser.parse_args(argv)
+    in_process = not args.subprocess
+    # Nenhum fonte mudou desde o ultimo preparo bem-sucedido: basta restaurar o snapshot.
+    restored = not args.rebuild_fixture and _fixture_is_fresh() and _restore_fixture()
+    if not restored and not in_process:
+        run_setup_subprocess()
+        _save_fixture()
+    elif not restored:
+        # Compilacao e preparo do workspace tocam pastas disjuntas e rodam juntos; as amostras
+        # so sao geradas depois da limpeza, que esvazia a mesma pasta de entrada.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            compile_future = pool.submit(run_compile_check, in_process)
+            samples_future = pool.submit(_clean_and_prepare, in_process)
+            compile_future.result()
+            samples_future.result()
+        _save_fixture()
+    run_pipeline(duration=25, in_process=in_process, use_worker=args.worker)
     validate_outputs()
     print("Pipeline automatizado validado com sucesso.")
 
 
 if __name__ == "__main__":
-    import os
-
     main()
@@ -0,0 +1,60 @@
+import sys
+import unittest
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.validator import Validator  # noqa: E402
+
+
+class _RisingGPT:
+    """Stub GPTCore whose reinforced passes return the given confidences (percent, as the model replies)."""
+
+    def __init__(self, confidences):
+        self.confidences = list(confidences)
+        self.calls = 0
+
+    def reanalyze_with_reinforcement(self, text, metadata, previous_result):
+        confidence = self.confidences[self.calls]
+        self.calls += 1
+        return {"categoria": previous_result.get("categoria"), "confianca": confidence}
+
+
+class ValidatorRetryTest(unittest.TestCase):
+    def _validator(self, gpt):
+        return Validator({"confidence_threshold": 0.8, "max_retries": 3}, gpt)
+
+    def test_rising_confidence_keeps_retrying_until_threshold(self):
+        gpt = _RisingGPT([70, 90])
+        result = self._validator(gpt).ensure_confidence(
+            {"categoria": "contratos", "confidence": 0.5}, "texto do contrato", {"nome": "a.txt"}
+        )
+        self.assertEqual(gpt.calls, 2)
+        self.assertEqual(result["categoria"], "contratos")
+        self.assertAlmostEqual(result["confidence"], 0.9)
+        self.assertEqual(result["validation_attempts"], 2)
+
+    def test_identical_document_is_reanalyzed_again(self):
+        # Feedback pode ter mudado a base entre as duas entregas: nada de respostas memorizadas.
+        gpt = _RisingGPT([70, 90, 70, 90])
+        validator = self._validator(gpt)
+        for _ in range(2):
+            result = validator.ensure_confidence(
+                {"categoria": "contratos", "confidence": 0.5}, "texto do contrato", {"nome": "a.txt"}
+            )
+            self.assertAlmostEqual(result["confidence"], 0.9)
+        self.assertEqual(gpt.calls, 4)
+
+    def test_plateau_stops_retries(self):
+        gpt = _RisingGPT([50, 60, 70])
+        result = self._validator(gpt).ensure_confidence(
+            {"categoria": "contratos", "confidence": 0.5}, "texto", {"nome": "b.txt"}
+        )
+        self.assertEqual(gpt.calls, 1)
+        self.assertEqual(result["categoria"], "Não identificada")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.watcher import IntakeWatcher  # noqa: E402
+
+
+class _RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event_type, payload):
+        self.events.append((event_type, payload))
+
+
+class _SlowFinalizingProcessor:
+    """Stub DocumentProcessor whose bundle finalization is still running when the watcher stops."""
+
+    teams_notifier = None
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = threading.Event()
+        self._finalizer = ThreadPoolExecutor(max_workers=1)
+
+    def process_file(self, file_path, processing_id=None):
+        self.started.set()
+        return self._finalizer.submit(self._finalize, Path(file_path))
+
+    def _finalize(self, path):
+        time.sleep(self.delay)
+        return path.with_suffix(".zip")
+
+    def shutdown(self, wait=True):
+        self._finalizer.shutdown(wait=wait)
+
+
+class IntakeWatcherStopTest(unittest.TestCase):
+    def test_stop_reports_pending_finalization_with_its_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            entrada, processamento = root / "entrada", root / "em_processamento"
+            entrada.mkdir()
+            processamento.mkdir()
+            (entrada / "doc.txt").write_text("conteudo", encoding="utf-8")
+            logger = _RecordingLogger()
+            processor = _SlowFinalizingProcessor(delay=0.5)
+            watcher = IntakeWatcher(entrada, processamento, processor, interval=1, logger=logger)
+            watcher.start()
+            self.assertTrue(processor.started.wait(5))
+            watcher.stop()
+
+            completed = [payload for event, payload in logger.events if event == "processing_completed"]
+            self.assertEqual(len(completed), 1)
+            self.assertEqual(completed[0]["file"], "doc.txt")
+            self.assertGreaterEqual(completed[0]["duration"], 0.4)
+            self.assertEqual(watcher.pending_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
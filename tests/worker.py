@@ -0,0 +1,106 @@
+"""Persistent test_run worker for repeated pipeline checks during development.
+
+Start it once with ``python tests/worker.py``; ``python tests/run_pipeline_checks.py --worker``
+then hands each pipeline run to this process instead of paying interpreter startup and the
+heavy pipeline imports again. Restart the worker after editing ``core/`` or ``main.py``.
+"""
+
+import json
+import os
+import secrets
+import sys
+import traceback
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+HOST = "127.0.0.1"
+# Porta 0 escolhe uma porta livre; o endereco real vai para o arquivo de credenciais.
+PORT = int(os.environ.get("CLASSIFIER_TEST_WORKER_PORT", "0"))
+# Porta + authkey aleatoria por execucao do worker, legivel apenas pelo dono (0600).
+CREDENTIALS_PATH = BASE_DIR / "tests" / ".worker_key"
+
+
+def _write_credentials(address: Tuple[str, int], authkey: bytes) -> None:
+    # Remove e recria com O_EXCL: um arquivo preexistente (com outras permissoes) nunca e reaproveitado.
+    CREDENTIALS_PATH.unlink(missing_ok=True)
+    fd = os.open(CREDENTIALS_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as handler:
+        json.dump({"host": address[0], "port": address[1], "authkey": authkey.hex()}, handler)
+
+
+def _read_credentials() -> Optional[Tuple[Tuple[str, int], bytes]]:
+    try:
+        data = json.loads(CREDENTIALS_PATH.read_text(encoding="utf-8"))
+        return (data["host"], int(data["port"])), bytes.fromhex(data["authkey"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def request_run(duration: float, quiet_period: float, timeout: float) -> Optional[Dict]:
+    """Ask a running worker for one pipeline run; ``None`` when no worker is listening."""
+    credentials = _read_credentials()
+    if credentials is None:
+        return None
+    address, authkey = credentials
+    try:
+        conn = Client(address, authkey=authkey)
+    except OSError:
+        return None
+    with conn:
+        conn.send({"cmd": "run", "duration": duration, "quiet_period": quiet_period})
+        if not conn.poll(timeout):
+            raise RuntimeError(f"Worker de testes nao respondeu em {timeout:.0f}s.")
+        return conn.recv()
+
+
+def serve() -> None:
+    os.chdir(BASE_DIR)
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    import test_run
+
+    authkey = secrets.token_bytes(32)
+    with Listener((HOST, PORT), authkey=authkey) as listener:
+        _write_credentials(listener.address, authkey)
+        host, port = listener.address
+        print(f"Worker de testes aguardando em {host}:{port} (Ctrl+C encerra).", flush=True)
+        try:
+            _serve_forever(listener, test_run)
+        finally:
+            CREDENTIALS_PATH.unlink(missing_ok=True)
+
+
+def _serve_forever(listener: Listener, test_run) -> None:
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as exc:
+            # Cliente sem a authkey correta (AuthenticationError) ou conexao abortada.
+            print(f"Conexao recusada: {exc}", flush=True)
+            continue
+        with conn:
+            request = conn.recv()
+            command = request.get("cmd")
+            if command == "stop":
+                conn.send({"returncode": 0, "stderr": ""})
+                return
+            if command != "run":
+                conn.send({"returncode": 2, "stderr": f"Comando desconhecido: {command!r}"})
+                continue
+            try:
+                # test_run.main fecha os componentes (threads, conexoes, sqlite) ao final de cada rodada.
+                test_run.main(float(request.get("duration", 25)), float(request.get("quiet_period", 2)))
+            except Exception:
+                conn.send({"returncode": 1, "stderr": traceback.format_exc()})
+            else:
+                conn.send({"returncode": 0, "stderr": ""})
+
+
+if __name__ == "__main__":
+    try:
+        serve()
+    except KeyboardInterrupt:
+        pass
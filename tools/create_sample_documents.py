@@ -1,8 +1,15 @@
 import argparse
-import shutil
+import os
+import sys
 import textwrap
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.fileio import write_all  # noqa: E402
 
 
 SAMPLES: List[Dict[str, str]] = [
@@ -134,24 +141,63 @@ SAMPLES: List[Dict[str, str]] = [
 ]
 
 
-def _write_sample_file(target: Path, payload: Dict[str, str], overwrite: bool) -> None:
-    if target.exists() and not overwrite:
+# Conteudo final de cada amostra ja codificado, calculado uma vez na importacao.
+_CONTENT_BYTES: Dict[str, bytes] = {
+    sample["filename"]: (sample["content"] + "\n").encode("utf-8") for sample in SAMPLES
+}
+
+_TARGETS_CACHE: Dict[str, List[Tuple[str, str, bytes]]] = {}
+
+
+def _sample_targets(base_dir: Path) -> List[Tuple[str, str, bytes]]:
+    """(samples path, entrada path, bytes) per sample, cached per base directory."""
+    key = os.fspath(base_dir)
+    targets = _TARGETS_CACHE.get(key)
+    if targets is None:
+        samples_dir = os.path.join(key, "samples")
+        entrada_dir = os.path.join(key, "folders", "entrada")
+        targets = [
+            (os.path.join(samples_dir, name), os.path.join(entrada_dir, name), data)
+            for name, data in _CONTENT_BYTES.items()
+        ]
+        _TARGETS_CACHE[key] = targets
+    return targets
+
+
+def _write_sample_file(target: str, data: bytes, overwrite: bool) -> None:
+    if not overwrite and os.path.exists(target):
         return
-    target.parent.mkdir(parents=True, exist_ok=True)
-    target.write_text(payload["content"] + "\n", encoding="utf-8")
+    with open(target, "wb") as handler:
+        handler.write(data)
 
 
 def create_samples(base_dir: Path, overwrite: bool, drop_into_entrada: bool) -> None:
-    samples_dir = base_dir / "samples"
-    entrada_dir = base_dir / "folders" / "entrada"
-    entrada_dir.mkdir(parents=True, exist_ok=True)
+    # As pastas sao garantidas uma unica vez; _write_sample_file assume que existem.
+    (base_dir / "samples").mkdir(parents=True, exist_ok=True)
+    (base_dir / "folders" / "entrada").mkdir(parents=True, exist_ok=True)
 
-    for sample in SAMPLES:
-        sample_path = samples_dir / sample["filename"]
-        _write_sample_file(sample_path, sample, overwrite)
+    # Caminhos como str pre-montados: nada de Path.__truediv__ dentro do laco.
+    for sample_path, entrada_path, data in _sample_targets(base_dir):
+        _write_sample_file(sample_path, data, overwrite)
         if drop_into_entrada:
-            destination = entrada_dir / sample["filename"]
-            shutil.copyfile(sample_path, destination)
+            _materialize_copy(sample_path, entrada_path, data)
+
+
+def _materialize_copy(source: str, destination: str, data: bytes) -> None:
+    """Hardlink ``source`` into place; without link support, write the in-memory ``data`` instead."""
+    try:
+        os.unlink(destination)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Reaproveita o buffer ja codificado: nada de reler a amostra do disco como faria copyfile.
+        fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            write_all(fd, data)
+        finally:
+            os.close(fd)
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -174,7 +220,7 @@ def build_arg_parser() -> argparse.ArgumentParser:
 def main() -> None:
     parser = build_arg_parser()
     args = parser.parse_args()
-    base_dir = Path(__file__).resolve().parent.parent
+    base_dir = BASE_DIR
     create_samples(base_dir, overwrite=args.overwrite, drop_into_entrada=args.drop_into_entrada)
     print(f"Samples gerados em {base_dir / 'samples'}")
     if args.drop_into_entrada:
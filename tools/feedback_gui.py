@@ -1,38 +1,61 @@
-import json
-import re
-import time
+import string
+import sys
 import tkinter as tk
+from datetime import datetime
 from pathlib import Path
 from tkinter import messagebox, ttk
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.fileio import atomic_write_bytes, dumps_pretty  # noqa: E402
+
 FEEDBACK_DIR = BASE_DIR / "folders" / "feedback"
+# Evita o stat/mkdir a cada envio: a pasta so e garantida na primeira gravacao.
+_FEEDBACK_DIR_READY = False
+
+
+class _SlugTable(dict):
+    """str.translate table: ASCII letters, digits, '_' and '-' stay; anything else becomes '-'."""
+
+    _ALLOWED = frozenset(string.ascii_lowercase + string.ascii_uppercase + string.digits + "_-")
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        value = char if char in self._ALLOWED else "-"
+        self[codepoint] = value
+        return value
+
+
+_SLUG_TABLE = _SlugTable()
 
 
 def _slugify(value: str) -> str:
-    slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", value.strip().lower())
-    slug = re.sub(r"-{2,}", "-", slug)
-    slug = slug.strip("-")
-    return slug or "documento"
+    mapped = value.strip().lower().translate(_SLUG_TABLE)
+    # split/join colapsa sequencias de "-" e remove as das pontas numa unica passada.
+    return "-".join(filter(None, mapped.split("-"))) or "documento"
 
 
 def _register_feedback(documento: str, status: str, nova_categoria: str, observacoes: str, autor: str) -> Path:
-    FEEDBACK_DIR.mkdir(parents=True, exist_ok=True)
+    global _FEEDBACK_DIR_READY
+    if not _FEEDBACK_DIR_READY:
+        FEEDBACK_DIR.mkdir(parents=True, exist_ok=True)
+        _FEEDBACK_DIR_READY = True
+    now = datetime.now()
     payload = {
         "documento": documento.strip(),
         "status": status.strip().lower() or "correto",
         "nova_categoria": nova_categoria.strip(),
         "observacoes": observacoes.strip(),
         "autor": autor.strip(),
-        "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "gerado_em": now.isoformat(timespec="seconds"),
     }
     slug = _slugify(payload["documento"])
-    filename = f"feedback_{slug}_{int(time.time())}.json"
+    filename = f"feedback_{slug}_{int(now.timestamp())}.json"
     target = FEEDBACK_DIR / filename
-    with open(target, "w", encoding="utf-8") as handler:
-        json.dump(payload, handler, indent=2, ensure_ascii=False)
-        handler.write("\n")
+    atomic_write_bytes(target, dumps_pretty(payload))
     return target
 
 
@@ -45,7 +68,7 @@ def _submit(form):
         documento=documento,
         status=form["status"].get(),
         nova_categoria=form["nova_categoria"].get(),
-        observacoes=form["observacoes"].get("1.0", tk.END),
+        observacoes=form["observacoes"].get("1.0", "end-1c"),
         autor=form["autor"].get(),
     )
     messagebox.showinfo(
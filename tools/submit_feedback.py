@@ -1,46 +1,56 @@
 import argparse
-import json
-import time
+import sys
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.fileio import atomic_write_bytes, dumps_pretty  # noqa: E402
+
+# Pastas de feedback ja garantidas neste processo (evita stat/mkdir repetidos).
+_READY_DIRS: Set[Path] = set()
 
 
 def _slugify(value: str) -> str:
     safe = "".join(ch if ch.isalnum() else "-" for ch in value.lower())
-    while "--" in safe:
-        safe = safe.replace("--", "-")
-    return safe.strip("-") or "documento"
+    # split/join colapsa sequencias de "-" e apara as pontas em uma unica passada.
+    return "-".join(filter(None, safe.split("-"))) or "documento"
 
 
 def _default_base_dir() -> Path:
-    return Path(__file__).resolve().parent.parent
+    return BASE_DIR
 
 
-def _build_payload(args: argparse.Namespace) -> dict:
+def _build_payload(args: argparse.Namespace, now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now()
     observacoes = "\n".join(args.observacoes or []).strip()
     return {
         "documento": args.documento,
         "status": args.status.lower(),
         "nova_categoria": args.nova_categoria or "",
         "observacoes": observacoes,
-        "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "gerado_em": now.isoformat(timespec="seconds"),
         "autor": args.autor or "",
     }
 
 
-def _write_payload(base_dir: Path, payload: dict, dry_run: bool) -> Path:
+def _write_payload(base_dir: Path, payload: dict, dry_run: bool, now: Optional[datetime] = None) -> Path:
     feedback_dir = base_dir / "folders" / "feedback"
-    feedback_dir.mkdir(parents=True, exist_ok=True)
+    if feedback_dir not in _READY_DIRS:
+        feedback_dir.mkdir(parents=True, exist_ok=True)
+        _READY_DIRS.add(feedback_dir)
     slug = _slugify(payload["documento"])
-    filename = f"feedback_{slug}_{int(time.time())}.json"
+    filename = f"feedback_{slug}_{int((now or datetime.now()).timestamp())}.json"
     target = feedback_dir / filename
+    data = dumps_pretty(payload)
     if dry_run:
-        print(json.dumps(payload, indent=2, ensure_ascii=False))
+        print(data.decode("utf-8"), end="")
         print(f"[dry-run] Arquivo seria salvo em: {target}")
         return target
-    with open(target, "w", encoding="utf-8") as handler:
-        json.dump(payload, handler, indent=2, ensure_ascii=False)
-        handler.write("\n")
+    atomic_write_bytes(target, data)
     return target
 
 
@@ -89,8 +99,10 @@ def _build_parser() -> argparse.ArgumentParser:
 def main() -> None:
     parser = _build_parser()
     args = parser.parse_args()
-    payload = _build_payload(args)
-    target = _write_payload(args.base_dir, payload, args.dry_run)
+    # Um unico instante alimenta o "gerado_em" do payload e o sufixo do arquivo.
+    now = datetime.now()
+    payload = _build_payload(args, now)
+    target = _write_payload(args.base_dir, payload, args.dry_run, now)
     if not args.dry_run:
         print(f"Feedback registrado em {target}")
 